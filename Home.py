@@ -1,10 +1,12 @@
 import streamlit as st
-from app.data.db import connect_database
-from app.services.user_service import register_user, login_user, migrate_users_from_file
+from app.services.db_session import get_connection
+from app.services.user_service import register_user, login_user, migrate_users_from_file, SERVER_BUSY_MESSAGE
+from app.services.login_throttle import get_login_throttle
+from app.services.session_service import create_session, validate_session, revoke_session
 from app.utility.user_validations import (validate_username, validate_password)
 
 st.set_page_config(page_title="Multi-Domain Intelligence Platform", page_icon="🔐", layout="centered", initial_sidebar_state="collapsed")
-conn = connect_database()
+conn = get_connection()
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 if "username" not in st.session_state:
@@ -13,6 +15,9 @@ if "role" not in st.session_state:
     st.session_state.role = None
 if "current_page" not in st.session_state:
     st.session_state.current_page = "Home"
+if st.session_state.logged_in and not validate_session(conn, st.session_state.get("session_token")):
+    # Session expired or was ended from another browser
+    st.session_state.logged_in = False
 
 st.header("Multi-Domain Intelligence Platform")
 st.header("Project Overview")
@@ -66,12 +71,14 @@ if st.session_state.logged_in:
     st.write(f"**Username**: {st.session_state.username}")
     st.write(f"**Role**: {st.session_state.role}")
     st.write(f"**Database**: Connected to `{conn}`")
-    st.write(f"**Session ID**: `{id(st.session_state)}`")
+    st.write(f"**Session ID**: `{st.session_state.session_token[:8]}…`")
     st.divider()
     if st.button("🚪 Logout", type="primary", use_container_width=True):
+        revoke_session(conn, st.session_state.get("session_token"))
         st.session_state.logged_in = False
         st.session_state.username = None
         st.session_state.role = None
+        st.session_state.session_token = None
         st.rerun()
     st.stop()
 
@@ -89,8 +96,15 @@ with tab_login:
         if not login_username or not login_password:
             st.error("Please enter both username and password.")
             st.stop()
+        login_throttle = get_login_throttle()
+        allowed, wait_seconds = login_throttle.check(conn, login_username)
+        if not allowed:
+            st.error(f"Too many failed attempts. Try again in {wait_seconds} seconds.")
+            st.stop()
         success, msg = login_user(conn, login_username, login_password)
         if success:
+            login_throttle.record_success(conn, login_username)
+            st.session_state.session_token = create_session(conn, login_username)[0]
             st.session_state.logged_in = True
             st.session_state.username = login_username
             st.session_state.role = f"{msg}"
@@ -100,8 +114,15 @@ with tab_login:
                 import time
                 time.sleep(1)
                 st.switch_page("pages/1_Dashboard.py")
+        elif msg == SERVER_BUSY_MESSAGE:
+            st.warning(f"⚠️ {msg}")
         else:
+            attempts_left = login_throttle.record_failure(conn, login_username)
             st.error(f"{msg}")
+            if attempts_left == 0:
+                st.error(f"Account locked for {login_throttle.lockout_seconds // 60} minutes.")
+            else:
+                st.warning(f"{attempts_left} attempt(s) left.")
 
 with tab_register:
     st.subheader("Create New Account")
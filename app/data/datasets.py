@@ -1,5 +1,16 @@
 import pandas as pd
 from app.data.db import connect_database
+from app.data.pagination import fetch_page
+from app.data.query_advisor import register_query
+from app.data.query_cache import cached_query, invalidates
+
+SELECT_ALL_DATASETS_SQL = register_query("get_all_datasets_metadata", """
+    SELECT *
+    FROM datasets_metadata
+    ORDER BY id DESC
+    """)
+
+@invalidates("datasets_metadata")
 def insert_datasets_metadata(conn, dataset_name, category, source, last_updated, record_count, file_size_mb):
     # Insert new incident
     cursor = conn.cursor()
@@ -16,11 +27,13 @@ def insert_datasets_metadata(conn, dataset_name, category, source, last_updated,
     cursor.execute(insert_dataset_metadata_sql, (dataset_name, category, source, last_updated, record_count, file_size_mb))
     return cursor.lastrowid
 
+@cached_query("datasets_metadata")
 def get_all_datasets_metadata(conn):
     # Get all incidents as DataFrame
-    select_data_sql = """
-    SELECT *
-    FROM datasets_metadata
-    ORDER BY id DESC
-    """
-    return pd.read_sql_query(select_data_sql, conn)
\ No newline at end of file
+    return pd.read_sql_query(SELECT_ALL_DATASETS_SQL, conn)
+
+@cached_query("datasets_metadata")
+def get_datasets_metadata_page(conn, columns=None, filters=None, page_size=50, page_token=None):
+    # Newest datasets first, returns (DataFrame, next_page_token)
+    return fetch_page(conn, "datasets_metadata", columns=columns, filters=filters,
+                      order_by="id", page_size=page_size, page_token=page_token)
@@ -1,4 +1,9 @@
+import atexit
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
 # Define paths
@@ -12,7 +17,256 @@ print(" Imports successful!")
 print(f" DATA folder: {DATA_DIR.resolve()}")
 print(f" Database will be created at: {DB_PATH.resolve()}")
 
-def connect_database(db_path=DB_PATH):
-    conn = sqlite3.connect(str(db_path))
+# SQLite tuning presets, picked with the DB_PROFILE environment variable
+DB_PROFILES = {
+    # Durable writes, WAL so readers never wait on a writer
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -2000,         # negative = KiB, ~2 MB
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,        # ms
+    },
+    # Many concurrent Streamlit readers
+    "dashboard": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,      # 256 MB
+        "cache_size": -65536,        # ~64 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # Large CSV loads, durability of the last commits traded for speed
+    "bulk_ingest": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 268435456,
+        "cache_size": -262144,       # ~256 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+}
+DEFAULT_DB_PROFILE = "safe"
+
+
+def get_db_profile(profile=None):
+    # Explicit name > DB_PROFILE env var > "safe"
+    name = profile or os.environ.get("DB_PROFILE", DEFAULT_DB_PROFILE)
+    if name not in DB_PROFILES:
+        raise ValueError(f"Unknown DB profile '{name}', expected one of {sorted(DB_PROFILES)}")
+    return DB_PROFILES[name]
+
+
+class TrackedConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that runs callbacks once the current transaction has
+    committed (commit() or a clean `with conn:` exit). A rollback drops them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._on_commit = []
+
+    def on_commit(self, callback):
+        self._on_commit.append(callback)
+
+    def _run_on_commit(self):
+        callbacks, self._on_commit = self._on_commit, []
+        for callback in callbacks:
+            callback()
+
+    def commit(self):
+        super().commit()
+        self._run_on_commit()
+
+    def rollback(self):
+        super().rollback()
+        self._on_commit.clear()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # The C implementation commits/rolls back without calling the methods above
+        result = super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is None:
+            self._run_on_commit()
+        else:
+            self._on_commit.clear()
+        return result
+
+
+def on_commit(conn, callback):
+    """
+    Run callback once conn's open transaction commits, or right away when
+    nothing is pending (autocommit, or a plain sqlite3 connection).
+    """
+    if conn.in_transaction and isinstance(conn, TrackedConnection):
+        conn.on_commit(callback)
+    else:
+        callback()
+
+
+def connect_database(db_path=DB_PATH, check_same_thread=True, profile=None):
+    settings = get_db_profile(profile)
+    conn = sqlite3.connect(str(db_path), check_same_thread=check_same_thread, factory=TrackedConnection)
     conn.execute("PRAGMA foreign_keys = ON")
-    return conn
\ No newline at end of file
+    # busy_timeout first so switching journal_mode waits instead of failing
+    conn.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+    conn.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+    conn.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+    conn.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+    conn.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+    conn.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+    return conn
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections shared between threads.
+
+    Connections are opened once and handed out again after a health check,
+    so callers skip the connect + PRAGMA cost. An owner can hold a lease that
+    is reused on every call it makes. When the owner is a thread (one Streamlit
+    script run), the lease goes back to the pool as soon as that thread has
+    finished; any other lease left idle longer than lease_idle_timeout is
+    reclaimed when the pool runs out. Reclaimed connections are rolled back.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_size=8, acquire_timeout=5.0, lease_idle_timeout=900, profile=None):
+        self.db_path = db_path
+        self.profile = profile
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.lease_idle_timeout = lease_idle_timeout
+        self._idle = []
+        self._leases = {}  # owner -> [conn, last_used]
+        self._opened = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        atexit.register(self.close_all)
+
+    def _open(self):
+        return connect_database(self.db_path, check_same_thread=False, profile=self.profile)
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._opened -= 1
+
+    def _reclaim_leases(self, idle_too=False):
+        # Leases of finished threads always, idle ones only when the pool is exhausted
+        now = time.monotonic()
+        for owner, (conn, last_used) in list(self._leases.items()):
+            owner_finished = isinstance(owner, threading.Thread) and not owner.is_alive()
+            if owner_finished or (idle_too and now - last_used > self.lease_idle_timeout):
+                del self._leases[owner]
+                try:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    self._idle.append(conn)
+                except sqlite3.Error:
+                    self._discard(conn)
+
+    def acquire(self):
+        """Take a healthy connection, waiting up to acquire_timeout when the pool is exhausted."""
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed")
+                if not self._idle and self._leases:
+                    self._reclaim_leases(idle_too=self._opened >= self.max_size)
+                if self._idle:
+                    conn = self._idle.pop()
+                    if self._is_healthy(conn):
+                        return conn
+                    self._discard(conn)
+                    continue
+                if self._opened < self.max_size:
+                    self._opened += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No database connection available after {self.acquire_timeout}s")
+                self._cond.wait(remaining)
+        try:
+            return self._open()
+        except sqlite3.Error:
+            with self._cond:
+                self._opened -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn):
+        """Give a connection back, rolling back anything left uncommitted."""
+        with self._cond:
+            if self._closed:
+                self._discard(conn)
+                return
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.append(conn)
+            except sqlite3.Error:
+                self._discard(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def lease(self, owner):
+        """
+        Connection pinned to owner, reused on every call until end_lease (or
+        until owner finishes, when owner is a threading.Thread).
+        """
+        with self._cond:
+            leased = self._leases.get(owner)
+            if leased and self._is_healthy(leased[0]):
+                leased[1] = time.monotonic()
+                return leased[0]
+            if leased:
+                del self._leases[owner]
+                self._discard(leased[0])
+        conn = self.acquire()
+        with self._cond:
+            self._leases[owner] = [conn, time.monotonic()]
+        return conn
+
+    def end_lease(self, owner):
+        with self._cond:
+            leased = self._leases.pop(owner, None)
+        if leased:
+            self.release(leased[0])
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "opened": self._opened,
+                "idle": len(self._idle),
+                "leased": len(self._leases),
+            }
+
+    def close_all(self):
+        """Close every connection, idle or leased. The pool refuses new work afterwards."""
+        with self._cond:
+            self._closed = True
+            for conn in self._idle + [leased[0] for leased in self._leases.values()]:
+                self._discard(conn)
+            self._idle.clear()
+            self._leases.clear()
+            self._cond.notify_all()
@@ -0,0 +1,195 @@
+"""
+Incident time series bucketed in SQL.
+
+Buckets are computed with strftime over cyber_incidents.date using the
+(incident_type, date, status) index. Buckets that lie before the current
+period are closed: once computed they are kept in memory, and later calls
+only query rows from the current period onwards.
+
+Closed buckets are checked against a fingerprint of the table read from the
+database (highest id, total and resolved counts from the trigger-maintained
+rollup), so inserts, deletes and status changes made by any process are
+noticed. Writes made through app/data report the dates they touched with
+invalidate_incident_dates(), and only the buckets holding those dates are
+queried again. Entries also expire after CLOSED_BUCKETS_TTL_SECONDS, which
+bounds how long an edit the fingerprint cannot see (another process moving
+an incident to a different date) stays hidden.
+"""
+import datetime
+import threading
+import time
+import pandas as pd
+from app.data.db import on_commit
+from app.data.query_cache import get_database_key
+from app.data.statuses import RESOLVED_STATUSES
+
+PERIOD_FORMATS = {
+    "day": "%Y-%m-%d",
+    "week": "%Y-W%W",   # weeks start on Monday, like SQLite's %W
+    "month": "%Y-%m",
+}
+CLOSED_BUCKETS_TTL_SECONDS = 15 * 60
+# Beyond this many touched dates a full rebuild is cheaper than per-bucket queries
+MAX_DIRTY_DATES = 64
+_ALL_DATES = None
+
+# (db, incident_type, period) -> {"fingerprint", "cutoff", "built_at", "closed": {bucket: (incidents, resolved)},
+#                                 "dirty": set of dates written since, _ALL_DATES for "everything"}
+_closed_buckets = {}
+_lock = threading.Lock()
+
+
+def current_period_start(period, today=None):
+    # First day of the bucket that is still open
+    today = today or datetime.date.today()
+    if period == "day":
+        return today
+    if period == "week":
+        return today - datetime.timedelta(days=today.weekday())
+    return today.replace(day=1)
+
+
+def _period_range(period, day):
+    # [start, end) of the day / week / month holding day
+    start = current_period_start(period, day)
+    if period == "day":
+        end = start + datetime.timedelta(days=1)
+    elif period == "week":
+        end = start + datetime.timedelta(days=7)
+    else:
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def _parse_date(value):
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return _ALL_DATES
+
+
+def invalidate_incident_dates(conn, dates=_ALL_DATES):
+    """
+    Once conn commits, drop the cached closed buckets that hold any of dates
+    (incident date strings); every closed bucket of the database when dates
+    is None.
+    """
+    if dates is _ALL_DATES:
+        touched = {_ALL_DATES}
+    else:
+        touched = {_parse_date(value) for value in dates if value is not None and not pd.isna(value)}
+    if not touched:
+        return
+    db_key = get_database_key(conn)
+
+    def mark():
+        with _lock:
+            for key, entry in _closed_buckets.items():
+                if key[0] != db_key or _ALL_DATES in entry["dirty"]:
+                    continue
+                entry["dirty"] |= touched
+                if len(entry["dirty"]) > MAX_DIRTY_DATES:
+                    entry["dirty"] = {_ALL_DATES}
+
+    on_commit(conn, mark)
+
+
+def _fingerprint(conn):
+    resolved = ", ".join("?" * len(RESOLVED_STATUSES))
+    cursor = conn.cursor()
+    cursor.execute(f"""
+    SELECT (SELECT MAX(id) FROM cyber_incidents),
+           (SELECT COALESCE(SUM(count), 0) FROM incident_severity_status_counts),
+           (SELECT COALESCE(SUM(count), 0) FROM incident_severity_status_counts WHERE status IN ({resolved}))
+    """, RESOLVED_STATUSES)
+    return cursor.fetchone()
+
+
+def _query_buckets(conn, incident_type, period, since=None, until=None):
+    fmt = PERIOD_FORMATS[period]
+    where = ["date IS NOT NULL"]
+    params = [fmt]
+    if incident_type is not None:
+        where.append("incident_type = ?")
+        params.append(incident_type)
+    if since is not None:
+        where.append("date >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("date < ?")
+        params.append(until)
+    query = f"""
+    SELECT strftime(?, date) AS bucket,
+           COUNT(*) AS incidents,
+           SUM(status IN ({", ".join("?" * len(RESOLVED_STATUSES))})) AS resolved
+    FROM cyber_incidents
+    WHERE {" AND ".join(where)}
+    GROUP BY bucket
+    ORDER BY bucket
+    """
+    params = params[:1] + list(RESOLVED_STATUSES) + params[1:]
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    return {bucket: (incidents, resolved or 0) for bucket, incidents, resolved in cursor.fetchall() if bucket}
+
+
+def _refresh_dates(conn, closed, incident_type, period, dates, open_bucket):
+    # Re-query only the periods holding dates; a week across New Year spans two buckets
+    fmt = PERIOD_FORMATS[period]
+    closed = dict(closed)
+    for start, end in {_period_range(period, day) for day in dates}:
+        closed.pop(start.strftime(fmt), None)
+        closed.pop((end - datetime.timedelta(days=1)).strftime(fmt), None)
+        for bucket, counts in _query_buckets(conn, incident_type, period,
+                                             since=start.isoformat(), until=end.isoformat()).items():
+            if bucket < open_bucket:
+                closed[bucket] = counts
+    return closed
+
+
+def get_incident_trend(conn, incident_type=None, period="month"):
+    """
+    DataFrame of [period, incidents, resolved, resolution_rate] for incident_type
+    (all types when None), one row per day / week / month with at least one incident.
+    """
+    if period not in PERIOD_FORMATS:
+        raise ValueError(f"period must be one of {sorted(PERIOD_FORMATS)}")
+    period_start = current_period_start(period)
+    cutoff = period_start.isoformat()
+    open_bucket = period_start.strftime(PERIOD_FORMATS[period])
+    cache_key = (get_database_key(conn), incident_type, period)
+    now = time.monotonic()
+    fingerprint = _fingerprint(conn)
+
+    with _lock:
+        cached = _closed_buckets.get(cache_key)
+        dirty = set()
+        if cached:
+            # Taken now; dates marked while we query stay pending for the next call
+            dirty, cached["dirty"] = cached["dirty"], set()
+    if (cached and cached["cutoff"] == cutoff and now - cached["built_at"] <= CLOSED_BUCKETS_TTL_SECONDS
+            and _ALL_DATES not in dirty and (dirty or cached["fingerprint"] == fingerprint)):
+        # Unchanged, or changed only by writes that reported their dates
+        closed = cached["closed"]
+        if dirty:
+            closed = _refresh_dates(conn, closed, incident_type, period, dirty, open_bucket)
+        built_at = cached["built_at"]
+    else:
+        # First call, a write from elsewhere, expiry, or the period rolled over: rebuild
+        closed = {bucket: counts for bucket, counts in _query_buckets(conn, incident_type, period).items()
+                  if bucket < open_bucket}
+        built_at = now
+    with _lock:
+        pending = _closed_buckets[cache_key]["dirty"] if cache_key in _closed_buckets else set()
+        _closed_buckets[cache_key] = {"fingerprint": fingerprint, "cutoff": cutoff, "built_at": built_at,
+                                      "closed": closed, "dirty": pending}
+
+    buckets = dict(closed)
+    buckets.update(_query_buckets(conn, incident_type, period, since=cutoff))
+
+    df = pd.DataFrame(
+        [(bucket, incidents, resolved) for bucket, (incidents, resolved) in sorted(buckets.items())],
+        columns=["period", "incidents", "resolved"]
+    )
+    df["resolution_rate"] = (df["resolved"] / df["incidents"] * 100).round(1)
+    return df
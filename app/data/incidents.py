@@ -1,6 +1,41 @@
 import pandas as pd
-from app.data.db import connect_database
+from app.data.db import connect_database, on_commit
+from app.data.incident_trends import invalidate_incident_dates
+from app.data.pagination import fetch_page
+from app.data.query_advisor import register_query
+from app.data.query_cache import cached_query, invalidates
+from app.data.retrieval import notify_index_changed
 
+SELECT_ALL_INCIDENTS_SQL = register_query("get_all_incidents", """
+    SELECT *
+    FROM cyber_incidents
+    ORDER BY id DESC
+    """)
+
+INCIDENTS_BY_TYPE_SQL = register_query("get_incidents_by_type_count", """
+    SELECT incident_type, COUNT(*) as count
+    FROM cyber_incidents
+    GROUP BY incident_type
+    ORDER BY count DESC
+    """)
+
+HIGH_SEVERITY_BY_STATUS_SQL = register_query("get_high_severity_by_status", """
+    SELECT status, COUNT(*) as count
+    FROM cyber_incidents
+    WHERE severity = 'High'
+    GROUP BY status
+    ORDER BY count DESC
+    """)
+
+INCIDENT_TYPES_WITH_MANY_CASES_SQL = register_query("get_incident_types_with_many_cases", """
+    SELECT incident_type, COUNT(*) as count
+    FROM cyber_incidents
+    GROUP BY incident_type
+    HAVING COUNT(*) > ?
+    ORDER BY count DESC
+    """, (5,))
+
+@invalidates("cyber_incidents")
 def insert_incident(conn, date, incident_type, severity, status, description, reported_by=None):
     # Insert new incident
     cursor = conn.cursor()
@@ -15,26 +50,36 @@ def insert_incident(conn, date, incident_type, severity, status, description, re
     ) VALUES (?, ?, ?, ?, ?, ?)
     """
     cursor.execute(insert_data_sql, (date, incident_type, severity, status, description, reported_by))
+    invalidate_incident_dates(conn, [date])
+    on_commit(conn, notify_index_changed)
     return cursor.lastrowid
 
+@cached_query("cyber_incidents")
 def get_all_incidents(conn):
     # Get all incidents as DataFrame
-    select_data_sql = """
-    SELECT *
-    FROM cyber_incidents
-    ORDER BY id DESC
-    """
-    return pd.read_sql_query(select_data_sql, conn)
+    return pd.read_sql_query(SELECT_ALL_INCIDENTS_SQL, conn)
 
+@cached_query("cyber_incidents")
+def get_incidents_page(conn, columns=None, filters=None, page_size=50, page_token=None):
+    # Newest incidents first, returns (DataFrame, next_page_token)
+    return fetch_page(conn, "cyber_incidents", columns=columns, filters=filters,
+                      order_by="id", page_size=page_size, page_token=page_token)
+
+@invalidates("cyber_incidents")
 def update_incident_status(conn, incident_id, new_status):
     cursor = conn.cursor()
+    cursor.execute("SELECT date FROM cyber_incidents WHERE id = ?", (incident_id,))
+    dates = [row[0] for row in cursor.fetchall()]
     update_data_sql = """
     UPDATE cyber_incidents
     SET status = ?
     WHERE id = ?"""
     cursor.execute(update_data_sql, (new_status, incident_id))
+    invalidate_incident_dates(conn, dates)
+    on_commit(conn, notify_index_changed)
     return cursor.rowcount
 
+@invalidates("cyber_incidents")
 def delete_incident(conn, incident_id):
     """
     Delete an incident from the database.
@@ -43,41 +88,28 @@ def delete_incident(conn, incident_id):
     """
     # TODO: Write DELETE SQL: DELETE FROM cyber_incidents WHERE id = ?
     cursor = conn.cursor()
+    cursor.execute("SELECT date FROM cyber_incidents WHERE id = ?", (incident_id,))
+    dates = [row[0] for row in cursor.fetchall()]
     delete_data_sql = """
     DELETE FROM cyber_incidents
     WHERE id = ?;
     """
     cursor.execute(delete_data_sql, (incident_id,))
+    invalidate_incident_dates(conn, dates)
+    on_commit(conn, notify_index_changed)
     return cursor.rowcount
 
+@cached_query("cyber_incidents")
 def get_incidents_by_type_count(conn):
-    query = """
-    SELECT incident_type, COUNT(*) as count
-    FROM cyber_incidents
-    GROUP BY incident_type
-    ORDER BY count DESC
-    """
-    df = pd.read_sql_query(query, conn)
+    df = pd.read_sql_query(INCIDENTS_BY_TYPE_SQL, conn)
     return df
 
+@cached_query("cyber_incidents")
 def get_high_severity_by_status(conn):
-    query = """
-    SELECT status, COUNT(*) as count
-    FROM cyber_incidents
-    WHERE severity = 'High'
-    GROUP BY status
-    ORDER BY count DESC
-    """
-    df = pd.read_sql_query(query, conn)
+    df = pd.read_sql_query(HIGH_SEVERITY_BY_STATUS_SQL, conn)
     return df
 
+@cached_query("cyber_incidents")
 def get_incident_types_with_many_cases(conn, min_count=5):
-    query = """
-    SELECT incident_type, COUNT(*) as count
-    FROM cyber_incidents
-    GROUP BY incident_type
-    HAVING COUNT(*) > ?
-    ORDER BY count DESC
-    """
-    df = pd.read_sql_query(query, conn, params=(min_count,))
+    df = pd.read_sql_query(INCIDENT_TYPES_WITH_MANY_CASES_SQL, conn, params=(min_count,))
     return df
\ No newline at end of file
@@ -0,0 +1,35 @@
+# Dashboard KPIs read from the rollup tables maintained by triggers (migration 0003)
+from app.data.query_cache import cached_query
+
+
+@cached_query("cyber_incidents", "it_tickets", "datasets_metadata")
+def get_kpi_summary(conn):
+    # A handful of primary-key / tiny-table lookups, independent of the base table sizes
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT COALESCE(SUM(count), 0) FROM incident_type_counts")
+    total_incidents = cursor.fetchone()[0]
+
+    cursor.execute("SELECT COALESCE(SUM(count), 0) FROM incident_severity_status_counts WHERE severity = 'High'")
+    high_severity = cursor.fetchone()[0]
+
+    cursor.execute("SELECT dataset_count, record_count, total_size_mb FROM dataset_totals WHERE id = 1")
+    dataset_row = cursor.fetchone() or (0, 0, 0.0)
+
+    cursor.execute("""
+    SELECT
+        COALESCE(SUM(CASE WHEN status != 'Resolved' THEN count END), 0),
+        COALESCE(SUM(CASE WHEN priority = 'High' THEN count END), 0)
+    FROM ticket_status_priority_counts
+    """)
+    open_tickets, high_priority_tickets = cursor.fetchone()
+
+    return {
+        "total_incidents": total_incidents,
+        "high_severity_incidents": high_severity,
+        "total_datasets": dataset_row[0],
+        "total_records": dataset_row[1],
+        "total_size_mb": dataset_row[2],
+        "open_tickets": open_tickets,
+        "high_priority_tickets": high_priority_tickets,
+    }
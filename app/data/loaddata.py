@@ -1,217 +1,441 @@
+import hashlib
+import time
 import pandas as pd
 import sqlite3
 from pathlib import Path
-def load_csv_to_table_cyber_incident(conn, csv_path, table_name):
-    # int: Number of rows loaded
+from app.data.incident_trends import invalidate_incident_dates
+from app.data.query_cache import bump_table_version
+
+# Rows per batch, every batch is transformed and committed on its own
+DEFAULT_CHUNK_SIZE = 5000
+
+# Explicit dtypes so pandas does not have to infer them per chunk. Numeric
+# columns are read as str and coerced per row by the loaders: a typed read
+# would fail the whole file on one bad cell
+INCIDENT_CSV_DTYPES = {
+    "incident_id": str,
+    "timestamp": str,
+    "severity": str,
+    "category": str,
+    "status": str,
+    "description": str,
+}
+DATASET_CSV_DTYPES = {
+    "dataset_id": str,
+    "name": str,
+    "rows": str,
+    "columns": str,
+    "uploaded_by": str,
+    "upload_date": str,
+}
+TICKET_CSV_DTYPES = {
+    "ticket_id": str,
+    "priority": str,
+    "description": str,
+    "status": str,
+    "assigned_to": str,
+    "created_at": str,
+    "resolution_time_hours": str,
+}
+
+
+def iter_csv_batches(csv_path, dtype, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Yield DataFrames of at most chunk_size rows, the file is never fully in memory
+    with pd.read_csv(csv_path, dtype=dtype, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def _coerce_numeric(values):
+    """(numbers, bad) where bad flags non-empty cells that are not numbers."""
+    numbers = pd.to_numeric(values, errors="coerce")
+    bad = numbers.isna() & values.notna() & (values.astype("string").str.strip() != "")
+    return numbers, bad
+
+
+def _coerce_datetime(values):
+    """(timestamps, bad) where bad flags non-empty cells that are not dates."""
+    timestamps = pd.to_datetime(values, errors="coerce")
+    bad = timestamps.isna() & values.notna() & (values.astype("string").str.strip() != "")
+    return timestamps, bad
+
+
+def _rows_for_sqlite(df):
+    # NaN/NA -> None so sqlite3 stores NULL
+    df = df.astype(object)
+    return df.where(df.notna(), None).itertuples(index=False, name=None)
+
+
+def _ingest_batches(conn, batches, table_name, write_batch, after_commit=None):
+    """
+    Run write_batch on every batch inside its own transaction.
+    write_batch returns the number of rows it wrote (trigger side effects excluded).
+    after_commit, when given, runs once a batch has committed.
+    A failing batch is rolled back and recorded, later batches still run.
+    Prints progress after each batch and returns the throughput stats.
+    A batch the CSV reader cannot parse is recorded the same way; the reader
+    cannot resume after it, so reading stops there.
+    """
+    stats = {"rows_read": 0, "rows_written": 0, "failed_batches": [], "rows_per_sec": 0.0}
+    started = time.perf_counter()
+    batches = iter(batches)
+    while True:
+        first_row = stats["rows_read"]
+        try:
+            batch = next(batches)
+        except StopIteration:
+            break
+        except (ValueError, pd.errors.ParserError) as e:
+            stats["failed_batches"].append((first_row, f"unreadable CSV: {e}"))
+            print(f"❌ {table_name}: CSV unreadable after row {first_row}: {e}")
+            break
+        stats["rows_read"] += len(batch)
+        try:
+            with conn:
+                written = write_batch(batch)
+        except sqlite3.Error as e:
+            stats["failed_batches"].append((first_row, str(e)))
+            continue
+        if after_commit:
+            after_commit()
+        stats["rows_written"] += written or 0
+        if written:
+            # Committed, cached reads of this table are now stale
+            bump_table_version(table_name)
+        elapsed = time.perf_counter() - started
+        stats["rows_per_sec"] = stats["rows_read"] / elapsed if elapsed > 0 else 0.0
+        print(f"⏳ {table_name}: {stats['rows_read']} rows read, "
+              f"{stats['rows_written']} written ({stats['rows_per_sec']:,.0f} rows/sec)")
+    return stats
+
+
+def _file_fingerprint(csv_path):
+    # (size, mtime) come from one stat call, the hash is only computed on demand
+    stat = csv_path.stat()
+    return stat.st_size, stat.st_mtime
+
+
+def _file_hash(csv_path):
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_ingest_state(conn, csv_path):
+    cursor = conn.cursor()
+    cursor.execute("""
+    SELECT file_size, file_mtime, content_hash, rows_synced
+    FROM ingest_state
+    WHERE source_path = ?
+    """, (str(Path(csv_path).resolve()),))
+    return cursor.fetchone()
+
+
+def save_ingest_state(conn, csv_path, table_name, file_size, file_mtime, content_hash, rows_synced):
+    cursor = conn.cursor()
+    cursor.execute("""
+    INSERT INTO ingest_state (source_path, table_name, file_size, file_mtime, content_hash, rows_synced, synced_at)
+    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(source_path) DO UPDATE SET
+        table_name = excluded.table_name,
+        file_size = excluded.file_size,
+        file_mtime = excluded.file_mtime,
+        content_hash = excluded.content_hash,
+        rows_synced = excluded.rows_synced,
+        synced_at = excluded.synced_at
+    """, (str(Path(csv_path).resolve()), table_name, file_size, file_mtime, content_hash, rows_synced))
+
+
+def sync_csv_to_table_cyber_incident(conn, csv_path, table_name="cyber_incidents", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Incrementally sync the incidents CSV into cyber_incidents.
+    The CSV incident_id is kept as source_incident_id and used as the upsert key.
+    Files whose size and mtime match ingest_state are skipped without being read,
+    files that were only touched are skipped after a hash check.
+    Returns a dict with the sync status and the number of rows added or changed.
+    """
+    csv_path = Path(csv_path)
+    result = {"status": "missing", "upserted": 0, "rejects": [], "rows_per_sec": 0.0}
     if not csv_path.exists():
-        print(f"File not found: {csv_path}")
-        return
-
-    df = pd.read_csv(csv_path)
-    
-    df = df.rename(columns={
-        "timestamp": "date",
-        "category": "incident_type"
-    })
-    df = df.drop(columns=["incident_id"])
-    df["reported_by"] = None
-    return df.to_sql(
-        name=table_name,
-        con=conn,
-        if_exists="append",
-        index=False
+        print(f"⚠️ File not found: {csv_path}")
+        return result
+
+    file_size, file_mtime = _file_fingerprint(csv_path)
+    state = get_ingest_state(conn, csv_path)
+    if state and state[0] == file_size and state[1] == file_mtime:
+        result["status"] = "unchanged"
+        return result
+
+    content_hash = _file_hash(csv_path)
+    if state and state[2] == content_hash:
+        # Touched but identical, remember the new mtime and keep the last sync's row count
+        with conn:
+            save_ingest_state(conn, csv_path, table_name, file_size, file_mtime, content_hash, state[3])
+        result["status"] = "unchanged"
+        return result
+
+    columns = ["source_incident_id", "date", "incident_type", "severity", "status", "description"]
+    # Only rows that are new or differ from the stored copy count as changes
+    upsert_sql = f"""
+    INSERT INTO {table_name} ({", ".join(columns)})
+    VALUES ({", ".join("?" * len(columns))})
+    ON CONFLICT(source_incident_id) DO UPDATE SET
+        date = excluded.date,
+        incident_type = excluded.incident_type,
+        severity = excluded.severity,
+        status = excluded.status,
+        description = excluded.description
+    WHERE date IS NOT excluded.date
+        OR incident_type IS NOT excluded.incident_type
+        OR severity IS NOT excluded.severity
+        OR status IS NOT excluded.status
+        OR description IS NOT excluded.description
+    """
+
+    # Rows appended by the old loader have no source_incident_id. They are
+    # claimed by natural key before the upsert, so the first sync of an existing
+    # database updates them instead of inserting every incident a second time
+    claim_sql = f"""
+    UPDATE {table_name} SET source_incident_id = ?
+    WHERE id = (
+        SELECT id FROM {table_name}
+        WHERE source_incident_id IS NULL
+            AND date IS ? AND incident_type IS ? AND severity IS ? AND status IS ? AND description IS ?
+        LIMIT 1
     )
+    AND NOT EXISTS (SELECT 1 FROM {table_name} WHERE source_incident_id = ?)
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT 1 FROM {table_name} WHERE source_incident_id IS NULL LIMIT 1")
+    has_legacy_rows = cursor.fetchone() is not None
+
+    pending_rejects = []
+
+    def write_batch(df):
+        pending_rejects.clear()
+        df = df.rename(columns={
+            "incident_id": "source_incident_id",
+            "timestamp": "date",
+            "category": "incident_type"
+        })
+        # The upsert key must be a number, other rows are reported and skipped
+        source_ids, bad_id = _coerce_numeric(df["source_incident_id"])
+        missing_id = source_ids.isna()
+        pending_rejects.extend(
+            (raw, "incident_id is not a number") if bad else (None, "missing incident_id")
+            for raw, bad in zip(df.loc[missing_id, "source_incident_id"], bad_id[missing_id])
+        )
+        df = df[~missing_id].assign(source_incident_id=source_ids[~missing_id].astype("int64"))
+        df = df.drop_duplicates(subset=["source_incident_id"], keep="last")
+        rows = list(_rows_for_sqlite(df[columns]))
+        claimed = conn.executemany(claim_sql, [row + (row[0],) for row in rows]).rowcount if has_legacy_rows else 0
+        written = claimed + conn.executemany(upsert_sql, rows).rowcount
+        # An upsert may move an incident to another date, whose old bucket is unknown here
+        invalidate_incident_dates(conn)
+        return written
+
+    def after_commit():
+        result["rejects"].extend(pending_rejects)
+
+    stats = _ingest_batches(conn, iter_csv_batches(csv_path, INCIDENT_CSV_DTYPES, chunk_size), table_name,
+                            write_batch, after_commit)
+    result["upserted"] = stats["rows_written"]
+    if result["rejects"]:
+        print(f"⚠️ Skipped {len(result['rejects'])} incident rows without a valid incident_id")
+    result["rows_per_sec"] = stats["rows_per_sec"]
+    if stats["failed_batches"]:
+        # Leave ingest_state alone so the next start retries the file
+        result["status"] = "failed"
+        print(f"❌ {len(stats['failed_batches'])} batch(es) failed while syncing {table_name}")
+        return result
 
-def load_csv_to_table_datasets_metadata(conn, csv_path, table_name):
+    with conn:
+        save_ingest_state(conn, csv_path, table_name, file_size, file_mtime, content_hash, result["upserted"])
+    result["status"] = "synced"
+    print(f"✅ Synced {result['upserted']} new or changed rows into {table_name}")
+    return result
+
+
+def load_csv_to_table_cyber_incident(conn, csv_path, table_name="cyber_incidents", chunk_size=DEFAULT_CHUNK_SIZE):
+    # Kept for old callers; returns the number of rows added or changed
+    return sync_csv_to_table_cyber_incident(conn, csv_path, table_name, chunk_size)["upserted"]
+
+def load_csv_to_table_datasets_metadata(conn, csv_path, table_name, chunk_size=DEFAULT_CHUNK_SIZE):
     """
     Simplified version for loading datasets metadata.
     Assumes CSV has: dataset_id, name, rows, columns, uploaded_by, upload_date
     """
-    import pandas as pd
-    from pathlib import Path
-    
     csv_path = Path(csv_path)
-    
+
     if not csv_path.exists():
         print(f"⚠️ File not found: {csv_path}")
         return 0
-    
-    df = pd.read_csv(csv_path)
-    
-    # Create a new DataFrame with the exact database schema
-    df_db = pd.DataFrame()
-    
-    # Map CSV columns to database columns
-    df_db["dataset_name"] = df["name"]  # CSV 'name' -> DB 'dataset_name'
-    df_db["record_count"] = df["rows"]  # CSV 'rows' -> DB 'record_count'
-    df_db["source"] = df["uploaded_by"]  # CSV 'uploaded_by' -> DB 'source'
-    df_db["last_updated"] = df["upload_date"]  # CSV 'upload_date' -> DB 'last_updated'
-    
-    # Add calculated/derived columns
-    df_db["category"] = "General"  # Default category
-    
-    # Calculate file_size_mb: (rows × columns × 100 bytes) / (1024×1024)
-    df_db["file_size_mb"] = (df["rows"] * df["columns"] * 100) / (1024 * 1024)
-    df_db["file_size_mb"] = df_db["file_size_mb"].round(2)
-    
-    # Insert into database
-    rows_loaded = df_db.to_sql(
-        name=table_name,
-        con=conn,
-        if_exists="append",
-        index=False
-    )
-    
-    print(f"✅ Loaded {rows_loaded} datasets into {table_name}")
+
+    def write_batch(df):
+        # Rows whose counts are not numbers are skipped, not stored as garbage
+        rows, bad_rows = _coerce_numeric(df["rows"])
+        columns, bad_columns = _coerce_numeric(df["columns"])
+        bad = bad_rows | bad_columns
+        skipped[0] += int(bad.sum())
+        df = df[~bad].assign(rows=rows[~bad].astype("Int64"), columns=columns[~bad].astype("Int64"))
+
+        # Create a new DataFrame with the exact database schema
+        df_db = pd.DataFrame()
+
+        # Map CSV columns to database columns
+        df_db["dataset_name"] = df["name"]  # CSV 'name' -> DB 'dataset_name'
+        df_db["record_count"] = df["rows"]  # CSV 'rows' -> DB 'record_count'
+        df_db["source"] = df["uploaded_by"]  # CSV 'uploaded_by' -> DB 'source'
+        df_db["last_updated"] = df["upload_date"]  # CSV 'upload_date' -> DB 'last_updated'
+
+        # Add calculated/derived columns
+        df_db["category"] = "General"  # Default category
+
+        # Calculate file_size_mb: (rows × columns × 100) / (1024×1024)
+        df_db["file_size_mb"] = (df["rows"] * df["columns"] * 100) / (1024 * 1024)
+        df_db["file_size_mb"] = df_db["file_size_mb"].astype("float64").round(2)
+
+        # Insert into database
+        return df_db.to_sql(
+            name=table_name,
+            con=conn,
+            if_exists="append",
+            index=False
+        )
+
+    skipped = [0]
+    stats = _ingest_batches(conn, iter_csv_batches(csv_path, DATASET_CSV_DTYPES, chunk_size), table_name, write_batch)
+    rows_loaded = stats["rows_written"]
+    if skipped[0]:
+        print(f"⚠️ Skipped {skipped[0]} dataset rows with non-numeric rows/columns")
+    print(f"✅ Loaded {rows_loaded} datasets into {table_name} ({stats['rows_per_sec']:,.0f} rows/sec)")
     return rows_loaded
 
-def load_csv_to_table_it_tickets(conn, csv_path, table_name):
+TICKET_CSV_COLUMNS = ["ticket_id", "priority", "description", "status", "assigned_to", "created_at", "resolution_time_hours"]
+TICKET_DB_COLUMNS = [
+    "ticket_id", "priority", "status", "category",
+    "subject", "description", "created_date",
+    "resolved_date", "assigned_to"
+]
+
+
+def _prepare_ticket_frame(df):
+    """
+    Map a raw it_tickets CSV frame onto the database columns.
+    Every derived column is computed column-wise, no per-row Python calls.
+    Returns the frame and, per row, why it cannot be loaded (None when it can):
+    a created_at or resolution_time_hours that is given but does not parse.
+    """
+    df = df.rename(columns={"created_at": "created_date"})
+    description = df["description"].astype("string").str.strip()
+
+    if "category" not in df.columns:
+        # First word of the description, "General" when there is none
+        df["category"] = description.str.split(n=1).str[0].fillna("General")
+
+    if "subject" not in df.columns:
+        # First 50 chars of the description
+        too_long = description.str.len() > 50
+        df["subject"] = description.where(~too_long, description.str[:50] + "...")
+
+    # resolved_date = created_date + resolution_time_hours
+    created, bad_created = _coerce_datetime(df["created_date"])
+    hours, bad_hours = _coerce_numeric(df["resolution_time_hours"])
+    invalid = pd.Series(None, index=df.index, dtype=object)
+    invalid[bad_hours] = "resolution_time_hours is not a number"
+    invalid[bad_created] = "created_at is not a date"
+    resolved = created + pd.to_timedelta(hours, unit="h")
+    df["resolved_date"] = resolved.dt.strftime("%Y-%m-%d %H:%M:%S")
+
+    for col in TICKET_DB_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df = df[TICKET_DB_COLUMNS].astype(object)
+    return df.where(df.notna(), None), invalid
+
+
+def load_csv_to_table_it_tickets(conn, csv_path, table_name, chunk_size=DEFAULT_CHUNK_SIZE):
     """
-    Load IT tickets CSV data into the it_tickets table.
-    Handles duplicate ticket_id values by skipping or updating.
+    Stream IT tickets CSV data into the it_tickets table.
+    Rows whose ticket_id is repeated in the CSV or already in the table are skipped.
+    Each chunk is one executemany in its own transaction.
+    Returns a dict with the counts, throughput and a list of (ticket_id, reason) rejects.
     """
-    import pandas as pd
-    from pathlib import Path
-    
     csv_path = Path(csv_path)
-    
+    result = {
+        "rows_read": 0,
+        "inserted": 0,
+        "skipped_in_file": 0,
+        "skipped_existing": 0,
+        "rejects": [],
+        "rows_per_sec": 0.0,
+    }
+
     if not csv_path.exists():
         print(f"⚠️ File not found: {csv_path}")
-        return 0
-    
-    try:
-        # Read the CSV
-        df = pd.read_csv(csv_path)
-        print(f"📄 Read {len(df)} rows from {csv_path.name}")
-        
-        # Check if CSV has required columns
-        required_columns = ["ticket_id", "priority", "description", "status", "assigned_to", "created_at", "resolution_time_hours"]
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            print(f"❌ Missing required columns: {missing_columns}")
-            return 0
-        
-        # Create a copy for processing
-        df_processed = df.copy()
-        
-        # 1. Check for duplicate ticket_id in CSV itself
-        csv_duplicates = df_processed[df_processed.duplicated(subset=["ticket_id"], keep=False)]
-        if not csv_duplicates.empty:
-            print(f"⚠️ Found {len(csv_duplicates)} duplicate ticket_id(s) in CSV, keeping first occurrence")
-            df_processed = df_processed.drop_duplicates(subset=["ticket_id"], keep="first")
-        
-        # 2. Check for existing records in database
-        cursor = conn.cursor()
-        existing_tickets = []
-        
-        # Get all existing ticket_ids from database
-        cursor.execute("SELECT ticket_id FROM it_tickets")
-        existing_tickets = [row[0] for row in cursor.fetchall()]
-        
-        if existing_tickets:
-            # Filter out rows that already exist in database
-            before_filter = len(df_processed)
-            df_processed = df_processed[~df_processed["ticket_id"].isin(existing_tickets)]
-            after_filter = len(df_processed)
-            
-            duplicates_removed = before_filter - after_filter
-            if duplicates_removed > 0:
-                print(f"⚠️ Skipped {duplicates_removed} rows that already exist in database")
-        
-        # If no new rows to insert, return early
-        if df_processed.empty:
-            print("ℹ️ All rows already exist in database, nothing to insert")
-            return 0
-        
-        # 3. Prepare columns for database schema
-        # Map CSV columns to database columns
-        df_processed = df_processed.rename(columns={
-            "created_at": "created_date"
-        })
-        
-        # Add missing columns with default values
-        if "category" not in df_processed.columns:
-            # Extract category from first word of description
-            df_processed["category"] = df_processed["description"].apply(
-                lambda x: x.split()[0] if isinstance(x, str) and x.strip() else "General"
-            )
-        
-        if "subject" not in df_processed.columns:
-            # Create subject from description (first 50 chars)
-            df_processed["subject"] = df_processed["description"].apply(
-                lambda x: (x[:50] + "...") if isinstance(x, str) and len(x) > 50 else x
-            )
-        
-        # Calculate resolved_date from created_date + resolution_time_hours
-        if "resolution_time_hours" in df_processed.columns:
-            from datetime import datetime, timedelta
-            
-            def calculate_resolved_date(row):
-                try:
-                    if pd.isna(row.get("resolution_time_hours")) or row["resolution_time_hours"] == "":
-                        return None
-                    
-                    # Parse created_date
-                    created = datetime.strptime(str(row["created_date"]), "%Y-%m-%d")
-                    # Add hours
-                    resolved = created + timedelta(hours=float(row["resolution_time_hours"]))
-                    return resolved.strftime("%Y-%m-%d")
-                except Exception as e:
-                    print(f"Warning: Could not calculate resolved_date for ticket {row.get('ticket_id')}: {e}")
-                    return None
-            
-            df_processed["resolved_date"] = df_processed.apply(calculate_resolved_date, axis=1)
-        else:
-            df_processed["resolved_date"] = None
-        
-        # Ensure all database columns exist
-        db_columns = [
-            "ticket_id", "priority", "status", "category", 
-            "subject", "description", "created_date", 
-            "resolved_date", "assigned_to"
-        ]
-        
-        # Add any missing columns with None
-        for col in db_columns:
-            if col not in df_processed.columns:
-                df_processed[col] = None
-        
-        # Reorder columns to match database
-        df_processed = df_processed[db_columns]
-        
-        # 4. Insert data with error handling for each row
-        rows_inserted = 0
-        cursor = conn.cursor()
-        
-        for _, row in df_processed.iterrows():
-            try:
-                cursor.execute("""
-                    INSERT INTO it_tickets 
-                    (ticket_id, priority, status, category, subject, description, created_date, resolved_date, assigned_to)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, tuple(row))
-                rows_inserted += 1
-            except sqlite3.IntegrityError as e:
-                if "UNIQUE constraint" in str(e):
-                    print(f"⚠️ Skipping duplicate ticket_id: {row['ticket_id']}")
-                    continue
-                else:
-                    print(f"❌ Error inserting ticket {row['ticket_id']}: {e}")
-            except Exception as e:
-                print(f"❌ Error inserting ticket {row['ticket_id']}: {e}")
-        
-        conn.commit()
-        
-        print(f"✅ Successfully inserted {rows_inserted} new rows into {table_name} table")
-        print(f"📊 Total tickets in database now: {len(existing_tickets) + rows_inserted}")
-        
-        return rows_inserted
-        
-    except Exception as e:
-        print(f"❌ Error loading CSV to {table_name}: {e}")
-        import traceback
-        traceback.print_exc()
-        conn.rollback()
-        return 0
+        return result
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    missing_columns = [col for col in TICKET_CSV_COLUMNS if col not in header]
+    if missing_columns:
+        print(f"❌ Missing required columns: {missing_columns}")
+        return result
+
+    # Only ticket ids are kept across chunks, never the rows themselves
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT ticket_id FROM {table_name}")
+    existing_tickets = {str(row[0]) for row in cursor.fetchall()}
+    seen_in_file = set()
+    # State of the batch in flight, only merged into result/seen_in_file once it commits
+    pending = {}
+
+    insert_sql = f"""
+    INSERT OR IGNORE INTO {table_name}
+    ({", ".join(TICKET_DB_COLUMNS)})
+    VALUES ({", ".join("?" * len(TICKET_DB_COLUMNS))})
+    """
+
+    def write_batch(df):
+        # 1. Duplicate ticket_id in the CSV itself, keep first occurrence
+        pending.clear()
+        in_file_dupes = df.duplicated(subset=["ticket_id"], keep="first") | df["ticket_id"].isin(seen_in_file)
+        pending["skipped_in_file"] = int(in_file_dupes.sum())
+        df = df[~in_file_dupes]
+        pending["seen"] = set(df["ticket_id"].dropna())
+
+        # 2. ticket_id already in the database
+        already_loaded = df["ticket_id"].isin(existing_tickets)
+        pending["skipped_existing"] = int(already_loaded.sum())
+        df, invalid = _prepare_ticket_frame(df[~already_loaded])
+
+        # 3. Rows the table would refuse (ticket_id and subject are NOT NULL) or
+        #    whose dates would silently be lost
+        invalid = invalid.where(invalid.notna() | df["subject"].notna(), "empty description, no subject")
+        invalid = invalid.where(df["ticket_id"].notna(), "missing ticket_id")
+        rejected = invalid.notna()
+        pending["rejects"] = list(zip(df.loc[rejected, "ticket_id"], invalid[rejected]))
+        df = df[~rejected]
+
+        # 4. Bulk insert, the it_tickets triggers update the resolution histograms
+        return cursor.executemany(insert_sql, df.itertuples(index=False, name=None)).rowcount
+
+    def after_commit():
+        # A rolled-back batch never gets here, so its ticket ids stay loadable
+        seen_in_file.update(pending["seen"])
+        result["skipped_in_file"] += pending["skipped_in_file"]
+        result["skipped_existing"] += pending["skipped_existing"]
+        result["rejects"].extend(pending["rejects"])
+
+    stats = _ingest_batches(conn, iter_csv_batches(csv_path, TICKET_CSV_DTYPES, chunk_size), table_name,
+                            write_batch, after_commit)
+    for first_row, error in stats["failed_batches"]:
+        result["rejects"].append((None, f"batch starting at row {first_row} rolled back: {error}"))
+    result["rows_read"] = stats["rows_read"]
+    result["inserted"] = stats["rows_written"]
+    result["rows_per_sec"] = stats["rows_per_sec"]
 
+    print(f"✅ Inserted {result['inserted']} rows into {table_name} "
+          f"(skipped {result['skipped_in_file'] + result['skipped_existing']}, rejected {len(result['rejects'])})")
+    return result
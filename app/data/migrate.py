@@ -0,0 +1,147 @@
+"""
+Versioned schema migrations.
+
+Each file in app/data/migrations is named NNNN_description.py and defines:
+    DESCRIPTION      one line shown in dry runs
+    up(conn)         applies the change
+    estimate(conn)   optional, rows the migration will touch (dry run)
+    TRANSACTIONAL    optional, False when up() commits its own batches
+
+A transactional migration runs inside an explicit BEGIN ... COMMIT together
+with its schema_version row. The sqlite3 module does not open a transaction
+for DDL on its own, so without the BEGIN a failing migration would leave its
+CREATE statements behind. up() must therefore not commit; a migration that
+does is rolled back (as far as possible) and reported instead of recorded.
+Migrations keep frozen copies of their SQL rather than importing schema.py.
+"""
+import importlib
+import pkgutil
+import sqlite3
+import sys
+from app.data import migrations
+
+
+def _available_migrations():
+    # (version, module_name) from the file names only, nothing is imported yet
+    found = []
+    for module in pkgutil.iter_modules(migrations.__path__):
+        prefix = module.name.split("_", 1)[0]
+        if prefix.isdigit():
+            found.append((int(prefix), module.name))
+    return sorted(found)
+
+
+def _load_migration(module_name):
+    return importlib.import_module(f"{migrations.__name__}.{module_name}")
+
+
+def get_schema_version(conn):
+    # Single query; a database that predates schema_version is version 0
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+def _create_schema_version_table(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def count_rows(conn, table_name):
+    # 0 for tables that do not exist yet
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+
+
+def backfill_in_batches(conn, table_name, set_sql, where_sql, params=(), batch_size=1000):
+    """
+    UPDATE table_name SET set_sql WHERE where_sql, batch_size rows per transaction.
+    where_sql must stop matching a row once it is updated, otherwise this never ends.
+    Keeps each write lock short so readers are not blocked on large tables.
+    Returns the number of rows updated.
+    """
+    update_sql = f"""
+    UPDATE {table_name}
+    SET {set_sql}
+    WHERE rowid IN (
+        SELECT rowid FROM {table_name} WHERE {where_sql} LIMIT ?
+    )
+    """
+    total = 0
+    while True:
+        with conn:
+            updated = conn.execute(update_sql, (*params, batch_size)).rowcount
+        total += updated
+        if updated < batch_size:
+            return total
+
+
+def migrate(conn, dry_run=False):
+    """
+    Apply every migration newer than the database's schema_version.
+    With dry_run=True nothing is changed; the pending migrations are returned
+    with their estimated affected rows instead.
+    """
+    current = get_schema_version(conn)
+    pending = [(version, name) for version, name in _available_migrations() if version > current]
+    if not pending:
+        return []
+
+    plan = []
+    for version, module_name in pending:
+        migration = _load_migration(module_name)
+        estimate = getattr(migration, "estimate", None)
+        plan.append({
+            "version": version,
+            "name": module_name,
+            "description": getattr(migration, "DESCRIPTION", ""),
+            # COUNT(*) scans, only worth it when someone reads the plan
+            "estimated_rows": estimate(conn) if estimate and dry_run else None,
+        })
+        if dry_run:
+            continue
+
+        print(f"⏳ Applying migration {module_name}")
+        if getattr(migration, "TRANSACTIONAL", True):
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN")
+            try:
+                _create_schema_version_table(conn)
+                migration.up(conn)
+                if not conn.in_transaction:
+                    raise RuntimeError(f"Migration {module_name} committed inside up(), it is not atomic")
+                conn.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, module_name))
+                conn.commit()
+            except BaseException:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+        else:
+            # Long backfills commit their own batches; the version is recorded once they finish
+            migration.up(conn)
+            with conn:
+                _create_schema_version_table(conn)
+                conn.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, module_name))
+    return plan
+
+
+if __name__ == "__main__":
+    # python -m app.data.migrate [--dry-run]
+    from app.data.db import connect_database
+    conn = connect_database()
+    is_dry_run = "--dry-run" in sys.argv[1:]
+    for step in migrate(conn, dry_run=is_dry_run):
+        rows = "?" if step["estimated_rows"] is None else step["estimated_rows"]
+        print(f"{'PENDING' if is_dry_run else 'APPLIED'} {step['name']}: {step['description']} (~{rows} rows)")
+    print(f"Schema version: {get_schema_version(conn)}")
+    conn.close()
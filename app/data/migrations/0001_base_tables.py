@@ -0,0 +1,82 @@
+DESCRIPTION = "users, cyber_incidents, datasets_metadata, it_tickets and ingest_state tables"
+
+# Frozen copy of the schema as of this migration; later changes get their own migration
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password_hash TEXT NOT NULL,
+        role TEXT DEFAULT 'user',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS cyber_incidents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        incident_type TEXT,
+        severity TEXT,
+        status TEXT,
+        description TEXT,
+        reported_by TEXT,
+        source_incident_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (reported_by) REFERENCES users(username) ON DELETE SET NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS datasets_metadata (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dataset_name TEXT NOT NULL,
+        category TEXT,
+        source TEXT,
+        last_updated TEXT,
+        record_count INTEGER,
+        file_size_mb REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS it_tickets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticket_id TEXT UNIQUE NOT NULL,
+        priority TEXT,
+        status TEXT,
+        category TEXT,
+        subject TEXT NOT NULL,
+        description TEXT,
+        created_date TEXT,
+        resolved_date TEXT,
+        assigned_to TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ingest_state (
+        source_path TEXT PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        file_size INTEGER,
+        file_mtime REAL,
+        content_hash TEXT,
+        rows_synced INTEGER,
+        synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+]
+
+
+def up(conn):
+    # IF NOT EXISTS, so databases made by the old bootstrap are adopted as-is
+    cursor = conn.cursor()
+    for sql in TABLES:
+        cursor.execute(sql)
+    # Databases created before source_incident_id existed
+    cursor.execute("PRAGMA table_info(cyber_incidents)")
+    if "source_incident_id" not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE cyber_incidents ADD COLUMN source_incident_id INTEGER")
+    # Natural key of rows synced from the CSV export
+    cursor.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_cyber_incidents_source_id
+    ON cyber_incidents (source_incident_id)
+    """)
@@ -0,0 +1,27 @@
+from app.data.migrate import count_rows
+
+DESCRIPTION = "secondary indexes on cyber_incidents and it_tickets"
+
+# Frozen copy of the index set as of this migration
+INDEXES = [
+    # WHERE severity = ? GROUP BY status, answered from the index alone
+    "CREATE INDEX IF NOT EXISTS idx_cyber_incidents_severity_status ON cyber_incidents (severity, status)",
+    # GROUP BY incident_type
+    "CREATE INDEX IF NOT EXISTS idx_cyber_incidents_type ON cyber_incidents (incident_type)",
+    # ORDER BY created_at
+    "CREATE INDEX IF NOT EXISTS idx_it_tickets_created_at ON it_tickets (created_at)",
+    # Status / priority filters on the ticket KPIs
+    "CREATE INDEX IF NOT EXISTS idx_it_tickets_status_priority ON it_tickets (status, priority)",
+    "CREATE INDEX IF NOT EXISTS idx_it_tickets_priority ON it_tickets (priority)",
+]
+
+
+def estimate(conn):
+    # Building an index reads every row of its table
+    return count_rows(conn, "cyber_incidents") + count_rows(conn, "it_tickets")
+
+
+def up(conn):
+    cursor = conn.cursor()
+    for sql in INDEXES:
+        cursor.execute(sql)
@@ -0,0 +1,142 @@
+from app.data.migrate import count_rows
+
+DESCRIPTION = "dashboard KPI rollup tables kept current by triggers"
+
+# NULL group keys are stored as '' so they can take part in the primary key
+ROLLUP_TABLES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS incident_type_counts (
+        incident_type TEXT PRIMARY KEY,
+        count INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS incident_severity_status_counts (
+        severity TEXT NOT NULL,
+        status TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (severity, status)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ticket_status_priority_counts (
+        status TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (status, priority)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dataset_totals (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        dataset_count INTEGER NOT NULL DEFAULT 0,
+        record_count INTEGER NOT NULL DEFAULT 0,
+        total_size_mb REAL NOT NULL DEFAULT 0
+    )
+    """,
+]
+
+BACKFILL_SQL = [
+    """
+    INSERT INTO incident_type_counts (incident_type, count)
+    SELECT COALESCE(incident_type, ''), COUNT(*) FROM cyber_incidents GROUP BY 1
+    """,
+    """
+    INSERT INTO incident_severity_status_counts (severity, status, count)
+    SELECT COALESCE(severity, ''), COALESCE(status, ''), COUNT(*) FROM cyber_incidents GROUP BY 1, 2
+    """,
+    """
+    INSERT INTO ticket_status_priority_counts (status, priority, count)
+    SELECT COALESCE(status, ''), COALESCE(priority, ''), COUNT(*) FROM it_tickets GROUP BY 1, 2
+    """,
+    """
+    INSERT INTO dataset_totals (id, dataset_count, record_count, total_size_mb)
+    SELECT 1, COUNT(*), COALESCE(SUM(record_count), 0), COALESCE(SUM(file_size_mb), 0) FROM datasets_metadata
+    """,
+]
+
+
+def _bump(table, keys, values, delta):
+    # Upsert one rollup row by delta, dropping it once it reaches zero
+    columns = ", ".join(keys)
+    match = " AND ".join(f"{key} = {value}" for key, value in zip(keys, values))
+    return f"""
+        INSERT INTO {table} ({columns}, count) VALUES ({", ".join(values)}, {delta})
+        ON CONFLICT ({columns}) DO UPDATE SET count = count + ({delta});
+        DELETE FROM {table} WHERE {match} AND count <= 0;
+    """
+
+
+def _group_key(row, column):
+    return f"COALESCE({row}.{column}, '')"
+
+
+def _count_triggers(source, table, keys):
+    new_values = [_group_key("NEW", key) for key in keys]
+    old_values = [_group_key("OLD", key) for key in keys]
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_ins AFTER INSERT ON {source}
+        BEGIN {_bump(table, keys, new_values, 1)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_del AFTER DELETE ON {source}
+        BEGIN {_bump(table, keys, old_values, -1)} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_upd AFTER UPDATE OF {", ".join(keys)} ON {source}
+        BEGIN {_bump(table, keys, old_values, -1)} {_bump(table, keys, new_values, 1)} END
+        """,
+    ]
+
+
+DATASET_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_dataset_totals_ins AFTER INSERT ON datasets_metadata
+    BEGIN
+        UPDATE dataset_totals SET
+            dataset_count = dataset_count + 1,
+            record_count = record_count + COALESCE(NEW.record_count, 0),
+            total_size_mb = total_size_mb + COALESCE(NEW.file_size_mb, 0)
+        WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_dataset_totals_del AFTER DELETE ON datasets_metadata
+    BEGIN
+        UPDATE dataset_totals SET
+            dataset_count = dataset_count - 1,
+            record_count = record_count - COALESCE(OLD.record_count, 0),
+            total_size_mb = total_size_mb - COALESCE(OLD.file_size_mb, 0)
+        WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_dataset_totals_upd AFTER UPDATE OF record_count, file_size_mb ON datasets_metadata
+    BEGIN
+        UPDATE dataset_totals SET
+            record_count = record_count - COALESCE(OLD.record_count, 0) + COALESCE(NEW.record_count, 0),
+            total_size_mb = total_size_mb - COALESCE(OLD.file_size_mb, 0) + COALESCE(NEW.file_size_mb, 0)
+        WHERE id = 1;
+    END
+    """,
+]
+
+
+def estimate(conn):
+    # The backfill reads every row once
+    return sum(count_rows(conn, table) for table in ("cyber_incidents", "it_tickets", "datasets_metadata"))
+
+
+def up(conn):
+    cursor = conn.cursor()
+    for sql in ROLLUP_TABLES_SQL + BACKFILL_SQL:
+        cursor.execute(sql)
+    triggers = (
+        _count_triggers("cyber_incidents", "incident_type_counts", ["incident_type"])
+        + _count_triggers("cyber_incidents", "incident_severity_status_counts", ["severity", "status"])
+        + _count_triggers("it_tickets", "ticket_status_priority_counts", ["status", "priority"])
+        + DATASET_TRIGGERS_SQL
+    )
+    for sql in triggers:
+        cursor.execute(sql)
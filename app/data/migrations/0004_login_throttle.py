@@ -0,0 +1,16 @@
+DESCRIPTION = "login_throttle table shared by the CLI and web logins"
+
+
+def up(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS login_throttle (
+        username TEXT PRIMARY KEY,
+        failures INTEGER NOT NULL DEFAULT 0,
+        window_start REAL NOT NULL,
+        locked_until REAL NOT NULL DEFAULT 0,
+        updated_at REAL NOT NULL
+    )
+    """)
+    # Expiry sweeps delete by age
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_login_throttle_updated_at ON login_throttle (updated_at)")
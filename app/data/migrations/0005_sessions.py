@@ -0,0 +1,19 @@
+DESCRIPTION = "server-side sessions table"
+
+
+def up(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        token_hash TEXT NOT NULL UNIQUE,
+        username TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_seen REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        FOREIGN KEY (username) REFERENCES users(username) ON DELETE CASCADE
+    )
+    """)
+    # Revoke-all by user and the expiry sweep
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_username ON sessions (username)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)")
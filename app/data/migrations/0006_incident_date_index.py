@@ -0,0 +1,15 @@
+from app.data.migrate import count_rows
+
+DESCRIPTION = "covering index for per-type incident time series"
+
+
+def estimate(conn):
+    return count_rows(conn, "cyber_incidents")
+
+
+def up(conn):
+    # WHERE incident_type = ? AND date >= ?, grouped on date and counted by status, from the index alone
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_cyber_incidents_type_date_status
+    ON cyber_incidents (incident_type, date, status)
+    """)
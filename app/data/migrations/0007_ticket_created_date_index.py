@@ -0,0 +1,11 @@
+from app.data.migrate import count_rows
+
+DESCRIPTION = "index for date-range filters on it_tickets.created_date"
+
+
+def estimate(conn):
+    return count_rows(conn, "it_tickets")
+
+
+def up(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_it_tickets_created_date ON it_tickets (created_date)")
@@ -0,0 +1,14 @@
+DESCRIPTION = "resolution time histograms per assignee and priority"
+
+
+def up(conn):
+    # Filled and kept current by the it_tickets triggers of 0012
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS resolution_histograms (
+        dimension TEXT NOT NULL,
+        key TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (dimension, key, bucket)
+    )
+    """)
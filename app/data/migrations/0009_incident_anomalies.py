@@ -0,0 +1,28 @@
+DESCRIPTION = "incident surge anomalies and the detector's progress marker"
+
+
+def up(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS incident_anomalies (
+        incident_type TEXT NOT NULL,
+        period TEXT NOT NULL,
+        bucket_start TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        expected REAL,
+        zscore REAL,
+        ewma_score REAL,
+        seasonal_score REAL,
+        methods TEXT NOT NULL,
+        detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (incident_type, period, bucket_start)
+    )
+    """)
+    # Dashboard reads the newest anomalies
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_incident_anomalies_bucket ON incident_anomalies (period, bucket_start)")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS anomaly_state (
+        period TEXT PRIMARY KEY,
+        last_incident_id INTEGER NOT NULL DEFAULT 0
+    )
+    """)
@@ -0,0 +1,17 @@
+DESCRIPTION = "disk tier of the AI assistant response cache"
+
+
+def up(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS ai_response_cache (
+        cache_key TEXT PRIMARY KEY,
+        domain TEXT NOT NULL,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    # Expiry sweep
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ai_response_cache_expires_at ON ai_response_cache (expires_at)")
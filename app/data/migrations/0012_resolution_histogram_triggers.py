@@ -0,0 +1,97 @@
+import math
+from app.data.migrate import count_rows
+
+DESCRIPTION = "keep resolution_histograms current with triggers on it_tickets"
+
+# Frozen copies of the resolution_stats settings as of this migration
+PRECISION = 0.02
+MIN_HOURS = 0.01
+MAX_HOURS = 100 * 365 * 24  # longer resolutions share the last bucket
+RESOLVED_SQL = "'Resolved', 'Closed'"
+# dimension -> key of a ticket row ({row} is NEW, OLD or the table alias)
+DIMENSION_KEYS = {
+    "all": "'*'",
+    "assignee": "COALESCE({row}.assigned_to, 'Unassigned')",
+    "priority": "COALESCE({row}.priority, 'Unassigned')",
+}
+
+
+def _bounds():
+    # (bucket, lower_hours), bucket b covers [(1 + PRECISION) ** b, (1 + PRECISION) ** (b + 1)) hours
+    log_base = math.log1p(PRECISION)
+    first = math.floor(math.log(MIN_HOURS) / log_base)
+    last = math.floor(math.log(MAX_HOURS) / log_base)
+    return [(bucket, math.exp(bucket * log_base)) for bucket in range(first, last + 1)]
+
+
+def _counted(row):
+    return (f"{row}.status IN ({RESOLVED_SQL}) AND julianday({row}.created_date) IS NOT NULL "
+            f"AND julianday({row}.resolved_date) IS NOT NULL")
+
+
+def _bucket(row):
+    hours = f"MAX((julianday({row}.resolved_date) - julianday({row}.created_date)) * 24, {MIN_HOURS})"
+    return (f"(SELECT bucket FROM resolution_bucket_bounds WHERE lower_hours <= {hours} "
+            f"ORDER BY lower_hours DESC LIMIT 1)")
+
+
+def _add(row, delta):
+    statements = []
+    for dimension, key in DIMENSION_KEYS.items():
+        key = key.format(row=row)
+        statements.append(f"""
+        INSERT INTO resolution_histograms (dimension, key, bucket, count)
+        SELECT '{dimension}', {key}, {_bucket(row)}, {delta} WHERE {_counted(row)}
+        ON CONFLICT (dimension, key, bucket) DO UPDATE SET count = count + ({delta});
+        """)
+        if delta < 0:
+            statements.append(f"""
+            DELETE FROM resolution_histograms WHERE dimension = '{dimension}' AND key = {key} AND count <= 0;
+            """)
+    return "".join(statements)
+
+
+TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_resolution_histograms_ins AFTER INSERT ON it_tickets
+    BEGIN {_add("NEW", 1)} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_resolution_histograms_del AFTER DELETE ON it_tickets
+    BEGIN {_add("OLD", -1)} END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_resolution_histograms_upd
+    AFTER UPDATE OF status, priority, assigned_to, created_date, resolved_date ON it_tickets
+    BEGIN {_add("OLD", -1)} {_add("NEW", 1)} END
+    """,
+]
+
+REBUILD_SQL = "INSERT INTO resolution_histograms (dimension, key, bucket, count)\n" + "\nUNION ALL\n".join(
+    f"SELECT '{dimension}', {key.format(row='t')}, {_bucket('t')}, COUNT(*) FROM it_tickets AS t "
+    f"WHERE {_counted('t')} GROUP BY 2, 3"
+    for dimension, key in DIMENSION_KEYS.items()
+)
+
+
+def estimate(conn):
+    # The recount reads every ticket once
+    return count_rows(conn, "it_tickets")
+
+
+def up(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS resolution_bucket_bounds (
+        bucket INTEGER PRIMARY KEY,
+        lower_hours REAL NOT NULL
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resolution_bucket_bounds_lower ON resolution_bucket_bounds (lower_hours)")
+    cursor.execute("DELETE FROM resolution_bucket_bounds")
+    cursor.executemany("INSERT INTO resolution_bucket_bounds (bucket, lower_hours) VALUES (?, ?)", _bounds())
+    for sql in TRIGGERS_SQL:
+        cursor.execute(sql)
+    # Counts written by the old Python path included rows INSERT OR IGNORE dropped, recount
+    cursor.execute("DELETE FROM resolution_histograms")
+    cursor.execute(REBUILD_SQL)
@@ -0,0 +1,56 @@
+DESCRIPTION = "incident_changes log filled by cyber_incidents triggers, read by the anomaly detector"
+
+# Only incident_type and date decide which counts an incident is part of
+TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_incident_changes_ins AFTER INSERT ON cyber_incidents
+    WHEN NEW.incident_type IS NOT NULL AND NEW.date IS NOT NULL
+    BEGIN
+        INSERT INTO incident_changes (incident_type, date) VALUES (NEW.incident_type, NEW.date);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_incident_changes_del AFTER DELETE ON cyber_incidents
+    WHEN OLD.incident_type IS NOT NULL AND OLD.date IS NOT NULL
+    BEGIN
+        INSERT INTO incident_changes (incident_type, date) VALUES (OLD.incident_type, OLD.date);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_incident_changes_upd AFTER UPDATE OF incident_type, date ON cyber_incidents
+    BEGIN
+        INSERT INTO incident_changes (incident_type, date)
+        SELECT OLD.incident_type, OLD.date WHERE OLD.incident_type IS NOT NULL AND OLD.date IS NOT NULL;
+        INSERT INTO incident_changes (incident_type, date)
+        SELECT NEW.incident_type, NEW.date WHERE NEW.incident_type IS NOT NULL AND NEW.date IS NOT NULL;
+    END
+    """,
+]
+
+
+def up(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS incident_changes (
+        change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        incident_type TEXT NOT NULL,
+        date TEXT NOT NULL
+    )
+    """)
+    for sql in TRIGGERS_SQL:
+        cursor.execute(sql)
+    cursor.execute("ALTER TABLE anomaly_state ADD COLUMN last_change_id INTEGER NOT NULL DEFAULT 0")
+    # Incidents added since the slowest period last ran still need scoring;
+    # the detector only needs each type's earliest and latest changed date
+    cursor.execute("""
+    INSERT INTO incident_changes (incident_type, date)
+    SELECT incident_type, MIN(date) FROM cyber_incidents
+    WHERE id > (SELECT COALESCE(MIN(last_incident_id), 0) FROM anomaly_state)
+        AND incident_type IS NOT NULL AND date IS NOT NULL
+    GROUP BY incident_type
+    UNION ALL
+    SELECT incident_type, MAX(date) FROM cyber_incidents
+    WHERE id > (SELECT COALESCE(MIN(last_incident_id), 0) FROM anomaly_state)
+        AND incident_type IS NOT NULL AND date IS NOT NULL
+    GROUP BY incident_type
+    """)
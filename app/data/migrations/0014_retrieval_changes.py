@@ -0,0 +1,45 @@
+DESCRIPTION = "retrieval_changes log of incident and ticket rows the vector index must re-embed"
+
+# source -> (table, columns that make up the indexed text)
+SOURCES = {
+    "incident": ("cyber_incidents", "incident_type, severity, status, date, description"),
+    "ticket": ("it_tickets", "priority, category, status, assigned_to, subject, description"),
+}
+
+
+def _triggers(source, table, columns):
+    log = "INSERT INTO retrieval_changes (source, row_id) VALUES ('{source}', {row}.id);"
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_retrieval_changes_{source}_ins AFTER INSERT ON {table}
+        BEGIN {log.format(source=source, row="NEW")} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_retrieval_changes_{source}_del AFTER DELETE ON {table}
+        BEGIN {log.format(source=source, row="OLD")} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_retrieval_changes_{source}_upd AFTER UPDATE OF id, {columns} ON {table}
+        BEGIN
+            {log.format(source=source, row="NEW")}
+            INSERT INTO retrieval_changes (source, row_id) SELECT '{source}', OLD.id WHERE OLD.id != NEW.id;
+        END
+        """,
+    ]
+
+
+def up(conn):
+    cursor = conn.cursor()
+    # AUTOINCREMENT: ids are never reused, so sqlite_sequence tells a reader whether it missed pruned changes
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS retrieval_changes (
+        change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        changed_at REAL NOT NULL DEFAULT (strftime('%s', 'now'))
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_retrieval_changes_changed_at ON retrieval_changes (changed_at)")
+    for source, (table, columns) in SOURCES.items():
+        for sql in _triggers(source, table, columns):
+            cursor.execute(sql)
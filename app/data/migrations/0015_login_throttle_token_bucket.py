@@ -0,0 +1,8 @@
+DESCRIPTION = "token bucket columns for login_throttle"
+
+
+def up(conn):
+    cursor = conn.cursor()
+    # NULL until a row's next failure: it then starts from a full bucket
+    cursor.execute("ALTER TABLE login_throttle ADD COLUMN tokens REAL")
+    cursor.execute("ALTER TABLE login_throttle ADD COLUMN refilled_at REAL")
@@ -0,0 +1,171 @@
+"""
+Keyset (seek) pagination shared by the get_*_page functions.
+
+Pages are ordered by a sort column plus id as tie-breaker, and the next page
+starts strictly after the last row returned, so every page costs one index
+seek no matter how deep into the table it is.
+"""
+import base64
+import json
+import sqlite3
+import threading
+import pandas as pd
+from app.data.query_cache import get_database_key
+
+# (db, what) -> (schema_version, value); any CREATE / ALTER / DROP bumps schema_version
+_schema_cache = {}
+_schema_lock = threading.Lock()
+
+
+def encode_page_token(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_page_token(token):
+    return json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+
+
+def _cached_schema_lookup(conn, what, load):
+    # PRAGMA schema_version is read from the database header, no sqlite_master scan
+    key = (get_database_key(conn), what)
+    schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    with _schema_lock:
+        cached = _schema_cache.get(key)
+    if cached and cached[0] == schema_version:
+        return list(cached[1])
+    value = load()
+    with _schema_lock:
+        _schema_cache[key] = (schema_version, value)
+    return list(value)
+
+
+def get_table_columns(conn, table_name):
+    def load():
+        cursor = conn.cursor()
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        return [row[1] for row in cursor.fetchall()]
+    return _cached_schema_lookup(conn, ("columns", table_name), load)
+
+
+def get_table_names(conn):
+    def load():
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
+        return [row[0] for row in cursor.fetchall()]
+    return _cached_schema_lookup(conn, "tables", load)
+
+
+def estimate_row_count(conn, table_name):
+    """
+    Approximate row count without scanning the table.
+    MAX(rowid) is a single b-tree seek and only overshoots by the number of
+    deleted rows; tables without a rowid fall back to ANALYZE stats, then COUNT(*).
+    """
+    if table_name not in get_table_names(conn):
+        raise ValueError(f"Unknown table '{table_name}'")
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT MAX(rowid) FROM {table_name}")
+        return cursor.fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        pass
+    try:
+        cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table_name,))
+        row = cursor.fetchone()
+        if row:
+            return int(row[0].split()[0])
+    except sqlite3.OperationalError:
+        pass
+    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+    return cursor.fetchone()[0]
+
+
+def _seek_predicate(sort_keys, last_values, descending):
+    """
+    WHERE clause that starts strictly after last_values.
+    Row-value comparison never matches NULL, and SQLite sorts NULL lowest,
+    so a nullable leading sort column needs the NULL rows spelled out.
+    """
+    comparison = "<" if descending else ">"
+    if len(sort_keys) == 1:
+        return f"{sort_keys[0]} {comparison} ?", list(last_values)
+    column, tiebreaker = sort_keys
+    value, last_tiebreaker = last_values
+    if value is None:
+        predicate = f"({column} IS NULL AND {tiebreaker} {comparison} ?)"
+        # Ascending: NULLs came first, every non-NULL row is still ahead
+        return (predicate if descending else f"({predicate} OR {column} IS NOT NULL)"), [last_tiebreaker]
+    predicate = f"({column}, {tiebreaker}) {comparison} (?, ?)"
+    # Descending: NULLs sort last, so they are all still ahead
+    return (f"({predicate} OR {column} IS NULL)" if descending else predicate), [value, last_tiebreaker]
+
+
+def fetch_page(conn, table_name, columns=None, filters=None, order_by="id", descending=True,
+               page_size=50, page_token=None):
+    """
+    Return (DataFrame, next_page_token) for one page of table_name.
+
+    columns      list of columns to return, all when None
+    filters      {column: value} equality filters, a list/tuple value means IN (...)
+    order_by     sort column, the row id is added as tie-breaker when it is not unique;
+                 None sorts by the row id alone
+    page_token   token returned by the previous call, None for the first page
+    next_page_token is None on the last page.
+    """
+    known_columns = get_table_columns(conn, table_name)
+    # Tables without an id column page on SQLite's implicit rowid
+    tiebreaker = "id" if "id" in known_columns else "rowid"
+    order_by = order_by or tiebreaker
+    requested = list(columns) if columns else known_columns
+    sort_keys = [order_by] if order_by == tiebreaker else [order_by, tiebreaker]
+    for col in requested + sort_keys + list(filters or {}):
+        # Identifiers are interpolated into the SQL, so only real column names pass
+        if col not in known_columns and col != tiebreaker:
+            raise ValueError(f"Unknown column '{col}' for table {table_name}")
+
+    # Sort keys are selected under their own aliases for the next-page token
+    selected = requested + [f"{key} AS _sort_{i}" for i, key in enumerate(sort_keys)]
+    where = []
+    params = []
+    for col, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set)):
+            value = list(value)
+            where.append(f"{col} IN ({', '.join('?' * len(value))})")
+            params.extend(value)
+        elif value is None:
+            where.append(f"{col} IS NULL")
+        else:
+            where.append(f"{col} = ?")
+            params.append(value)
+
+    if page_token:
+        predicate, seek_params = _seek_predicate(sort_keys, decode_page_token(page_token), descending)
+        where.append(predicate)
+        params.extend(seek_params)
+
+    direction = "DESC" if descending else "ASC"
+    query = f"""
+    SELECT {", ".join(selected)}
+    FROM {table_name}
+    {"WHERE " + " AND ".join(where) if where else ""}
+    ORDER BY {", ".join(f"{key} {direction}" for key in sort_keys)}
+    LIMIT ?
+    """
+    # One extra row tells us whether another page exists
+    df = pd.read_sql_query(query, conn, params=params + [page_size + 1])
+
+    next_page_token = None
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        last_row = df.iloc[-1]
+        next_page_token = encode_page_token(
+            [_to_json_value(last_row[f"_sort_{i}"]) for i in range(len(sort_keys))]
+        )
+    return df[requested], next_page_token
+
+
+def _to_json_value(value):
+    # numpy scalars -> plain Python for json, NaN (a NULL read by pandas) -> None
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
@@ -0,0 +1,51 @@
+# Registry of the read queries in app/data and an EXPLAIN QUERY PLAN check over them
+
+QUERY_REGISTRY = {}
+
+
+def register_query(name, sql, params=()):
+    # Called by the data modules at import time; params are sample values for EXPLAIN
+    QUERY_REGISTRY[name] = (sql, params)
+    return sql
+
+
+def explain_query(conn, sql, params=()):
+    cursor = conn.cursor()
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+    # Row layout: (id, parent, notused, detail)
+    return [row[3] for row in cursor.fetchall()]
+
+
+def _is_full_scan(detail):
+    # "SCAN cyber_incidents" (or "SCAN TABLE ..." on older SQLite) without an index
+    return detail.startswith("SCAN") and "INDEX" not in detail
+
+
+def advise(conn):
+    """
+    Run EXPLAIN QUERY PLAN for every registered query.
+    Returns one dict per query with its plan and the steps that still scan or sort.
+    """
+    # Importing the data modules registers their queries
+    from app.data import incidents, tickets, datasets, users  # noqa: F401
+
+    report = []
+    for name, (sql, params) in sorted(QUERY_REGISTRY.items()):
+        plan = explain_query(conn, sql, params)
+        report.append({
+            "query": name,
+            "plan": plan,
+            "full_scans": [step for step in plan if _is_full_scan(step)],
+            "temp_sorts": [step for step in plan if "TEMP B-TREE" in step],
+        })
+    return report
+
+
+def print_index_report(conn):
+    for entry in advise(conn):
+        if entry["full_scans"]:
+            print(f"⚠️ {entry['query']}: {'; '.join(entry['full_scans'])}")
+        else:
+            print(f"✅ {entry['query']}: uses an index")
+        for step in entry["temp_sorts"]:
+            print(f"   ℹ️ {step}")
@@ -0,0 +1,123 @@
+"""
+In-process cache for the read functions in app/data.
+
+Every cached function declares the tables it reads. Each table has a version
+counter that the write functions bump, and a cache key includes the versions
+of its tables, so a write makes exactly the dependent entries unreachable
+(they then age out of the LRU). The bump happens once the write's
+transaction commits, so a rolled back or failed write leaves the cache
+alone. Writes made by another process are not seen here; entries also
+expire after CACHE_TTL_SECONDS as a backstop.
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+from app.data.db import on_commit
+
+CACHE_MAX_ENTRIES = 256
+CACHE_TTL_SECONDS = 300
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> (value, stored_at)
+_table_versions = {}
+_metrics = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidations": 0}
+
+
+def bump_table_version(*table_names):
+    """Invalidate every cached result that read any of table_names."""
+    with _lock:
+        for table_name in table_names:
+            _table_versions[table_name] = _table_versions.get(table_name, 0) + 1
+        _metrics["invalidations"] += 1
+
+
+def get_table_version(table_name):
+    with _lock:
+        return _table_versions.get(table_name, 0)
+
+
+def get_database_key(conn):
+    # Cache entries are per database file; in-memory databases are per connection.
+    # PRAGMA database_list is answered from the connection itself, no disk access
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    return path or f"memory:{id(conn)}"
+
+
+def _freeze(value):
+    # Make list/dict arguments usable in a cache key
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _copy(value):
+    # Callers get their own DataFrame (or tuple of DataFrames) to modify
+    if hasattr(value, "copy"):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    return value
+
+
+def cached_query(*table_names):
+    """Decorator for read functions taking conn as their first argument."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            now = time.monotonic()
+            with _lock:
+                versions = tuple(_table_versions.get(name, 0) for name in table_names)
+            key = (func.__module__, func.__qualname__, get_database_key(conn), versions,
+                   _freeze(args), _freeze(kwargs))
+            with _lock:
+                entry = _entries.get(key)
+                if entry is not None and now - entry[1] <= CACHE_TTL_SECONDS:
+                    _entries.move_to_end(key)
+                    _metrics["hits"] += 1
+                    return _copy(entry[0])
+                if entry is not None:
+                    del _entries[key]
+                    _metrics["expired"] += 1
+                _metrics["misses"] += 1
+
+            value = func(conn, *args, **kwargs)
+            with _lock:
+                _entries[key] = (value, now)
+                _entries.move_to_end(key)
+                while len(_entries) > CACHE_MAX_ENTRIES:
+                    _entries.popitem(last=False)
+                    _metrics["evictions"] += 1
+            return _copy(value)
+        return wrapper
+    return decorator
+
+
+def invalidates(*table_names):
+    """
+    Decorator for write functions taking conn as their first argument. Bumps
+    the tables' versions when the caller commits the write; nothing is bumped
+    when the function raises.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            result = func(conn, *args, **kwargs)
+            on_commit(conn, lambda: bump_table_version(*table_names))
+            return result
+        return wrapper
+    return decorator
+
+
+def get_cache_metrics():
+    with _lock:
+        lookups = _metrics["hits"] + _metrics["misses"]
+        return dict(_metrics, entries=len(_entries),
+                    hit_rate=_metrics["hits"] / lookups if lookups else 0.0)
+
+
+def clear_query_cache():
+    with _lock:
+        _entries.clear()
@@ -0,0 +1,88 @@
+"""
+Streaming histograms of ticket resolution times.
+
+Resolution hours are counted into log-spaced buckets (each 2% wider than the
+last, HDR-histogram style), per assignee, per priority and overall, and the
+counts are kept in the resolution_histograms table. Triggers on it_tickets
+(migration 0012) add, move and remove a ticket's count on every insert,
+update and delete, in the same transaction and only for rows actually
+written, so p50/p90/p99 never need the tickets themselves: a query reads a
+few hundred bucket rows however many tickets there are, within ~1%
+relative error.
+"""
+import math
+import numpy as np
+import pandas as pd
+from app.data.db import on_commit
+from app.data.query_cache import bump_table_version, cached_query
+from app.data.statuses import RESOLVED_STATUSES
+
+PRECISION = 0.02
+MIN_HOURS = 0.01  # zero and negative durations land in the first bucket
+# dimension -> it_tickets column, "all" has the single key "*"
+DIMENSIONS = {"all": None, "assignee": "assigned_to", "priority": "priority"}
+
+_LOG_BASE = math.log1p(PRECISION)
+
+
+def bucket_for_hours(hours):
+    hours = np.maximum(np.asarray(hours, dtype="float64"), MIN_HOURS)
+    return np.floor(np.log(hours) / _LOG_BASE).astype("int64")
+
+
+def hours_for_bucket(bucket):
+    # Geometric middle of the bucket
+    return np.exp((np.asarray(bucket, dtype="float64") + 0.5) * _LOG_BASE)
+
+
+def _counted_sql(row):
+    resolved = ", ".join(f"'{status}'" for status in RESOLVED_STATUSES)
+    return (f"{row}.status IN ({resolved}) AND julianday({row}.created_date) IS NOT NULL "
+            f"AND julianday({row}.resolved_date) IS NOT NULL")
+
+
+def _bucket_sql(row):
+    # Same buckets as bucket_for_hours, looked up in resolution_bucket_bounds
+    hours = f"MAX((julianday({row}.resolved_date) - julianday({row}.created_date)) * 24, {MIN_HOURS})"
+    return (f"(SELECT bucket FROM resolution_bucket_bounds WHERE lower_hours <= {hours} "
+            f"ORDER BY lower_hours DESC LIMIT 1)")
+
+
+def rebuild_resolution_histograms(conn):
+    """
+    Recount every ticket from scratch. Not needed in normal operation (the
+    it_tickets triggers keep the counts exact), only after editing the
+    tables by hand. Does not commit. Returns the number of tickets counted.
+    """
+    conn.execute("DELETE FROM resolution_histograms")
+    selects = []
+    for dimension, column in DIMENSIONS.items():
+        key = "'*'" if column is None else f"COALESCE(t.{column}, 'Unassigned')"
+        selects.append(f"SELECT '{dimension}', {key}, {_bucket_sql('t')}, COUNT(*) FROM it_tickets AS t "
+                       f"WHERE {_counted_sql('t')} GROUP BY 2, 3")
+    conn.execute("INSERT INTO resolution_histograms (dimension, key, bucket, count)\n" + "\nUNION ALL\n".join(selects))
+    on_commit(conn, lambda: bump_table_version("resolution_histograms"))
+    total = conn.execute("SELECT COALESCE(SUM(count), 0) FROM resolution_histograms WHERE dimension = 'all'")
+    return total.fetchone()[0]
+
+
+# Ticket writes change the histograms through triggers
+@cached_query("resolution_histograms", "it_tickets")
+def get_resolution_percentiles(conn, dimension="priority", quantiles=(50, 90, 99)):
+    """DataFrame of [key, count, p50_hours, p90_hours, p99_hours] for one dimension."""
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"dimension must be one of {sorted(DIMENSIONS)}")
+    histogram = pd.read_sql_query(
+        "SELECT key, bucket, count FROM resolution_histograms WHERE dimension = ? ORDER BY key, bucket",
+        conn, params=(dimension,)
+    )
+    columns = ["key", "count"] + [f"p{q}_hours" for q in quantiles]
+    results = []
+    for key, group in histogram.groupby("key", sort=True):
+        cumulative = group["count"].to_numpy().cumsum()
+        total = int(cumulative[-1])
+        # Nearest rank: first bucket whose cumulative count reaches q% of the total
+        positions = np.searchsorted(cumulative, [math.ceil(q / 100 * total) for q in quantiles])
+        values = hours_for_bucket(group["bucket"].to_numpy()[positions])
+        results.append([key, total] + [round(float(v), 1) for v in values])
+    return pd.DataFrame(results, columns=columns)
@@ -0,0 +1,321 @@
+"""
+Retrieval over incident and ticket descriptions for the AI Assistant.
+
+Rows are embedded locally (no network) by a pluggable embedder, by default a
+signed hashing vectorizer, which needs no fitted vocabulary: a new row can be
+embedded on its own without changing any existing vector. Vectors live in a
+growable float16 NumPy matrix (L2-normalized, so cosine similarity is one
+matrix product), searched for several queries at once in chunks.
+
+The index is bounded: at most max_rows rows per source, the newest ids win,
+so a 512-dim index of the default 20,000 rows per source takes ~40 MB.
+
+It is built and kept current off the request path by one background thread
+per process (start_index_builder). The first pass embeds the newest rows of
+each table; after that the builder replays retrieval_changes, which triggers
+on cyber_incidents and it_tickets fill for every insert, update and delete
+(so only committed rows are ever indexed), re-embedding or removing each
+changed row. Write functions wake it up after they commit. retrieve() only
+searches: until the first pass is done it finds nothing.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+from app.data.db import connect_database
+
+# source -> (table, SQL expression for the indexed text)
+SOURCES = {
+    "incident": ("cyber_incidents", """
+        COALESCE(incident_type, '') || ' incident (' || COALESCE(severity, '') || ', ' || COALESCE(status, '')
+        || ') on ' || COALESCE(date, '') || ': ' || COALESCE(description, '')
+    """),
+    "ticket": ("it_tickets", """
+        COALESCE(priority, '') || ' priority ' || COALESCE(category, '') || ' ticket (' || COALESCE(status, '')
+        || ', ' || COALESCE(assigned_to, '') || '): ' || COALESCE(subject, '') || ' - ' || COALESCE(description, '')
+    """),
+}
+SYNC_BATCH_SIZE = 5000
+SEARCH_CHUNK_ROWS = 16384
+MAX_ROWS_PER_SOURCE = int(os.environ.get("RAG_MAX_ROWS", 20000))
+# Changes older than this are pruned; an index further behind rebuilds instead
+CHANGE_RETENTION_SECONDS = 24 * 60 * 60
+# A full pass embeds at most this many rows, so replaying a longer backlog
+# (a bulk CSV load) costs more than rebuilding: only this many changes are kept
+MAX_RETAINED_CHANGES = len(SOURCES) * MAX_ROWS_PER_SOURCE
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """
+    Words and word bigrams hashed into dim buckets with a sign bit, sublinear
+    term frequency, L2-normalized. Any object with dim and embed(texts) can
+    replace it.
+    """
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self._bucket_cache = {}
+
+    def _bucket(self, term):
+        bucket = self._bucket_cache.get(term)
+        if bucket is None:
+            # Stable across processes, unlike hash()
+            value = int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+            bucket = (value % self.dim, 1.0 if value >> 63 else -1.0)
+            if len(self._bucket_cache) < 200000:
+                self._bucket_cache[term] = bucket
+        return bucket
+
+    def embed(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _TOKEN_RE.findall((text or "").lower())
+            terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            for term in terms:
+                column, sign = self._bucket(term)
+                matrix[row, column] += sign
+        # Sublinear tf keeps repeated words from dominating
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class VectorIndex:
+    def __init__(self, embedder=None, max_rows=MAX_ROWS_PER_SOURCE, initial_capacity=1024):
+        self.embedder = embedder or HashingEmbedder()
+        self.max_rows = max_rows
+        # float16 halves memory again; scores are computed in float32
+        self._vectors = np.zeros((initial_capacity, self.embedder.dim), dtype=np.float16)
+        self._keys = []        # slot -> (source, row_id)
+        self._texts = []       # slot -> indexed text
+        self._slots = {}       # (source, row_id) -> slot
+        self._last_change_id = None  # None until the first full pass
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def ready(self):
+        return self._last_change_id is not None
+
+    def _grow(self, needed):
+        capacity = len(self._vectors)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        grown = np.zeros((capacity, self.embedder.dim), dtype=np.float16)
+        grown[:len(self._keys)] = self._vectors[:len(self._keys)]
+        self._vectors = grown
+
+    def add(self, source, row_ids, texts):
+        """Embed and store rows; a row already in the index is replaced in place."""
+        if not texts:
+            return
+        vectors = self.embedder.embed(list(texts))
+        with self._lock:
+            self._grow(len(self._keys) + len(texts))
+            for row_id, text, vector in zip(row_ids, texts, vectors):
+                key = (source, int(row_id))
+                slot = self._slots.get(key)
+                if slot is None:
+                    slot = len(self._keys)
+                    self._slots[key] = slot
+                    self._keys.append(key)
+                    self._texts.append(text)
+                else:
+                    self._texts[slot] = text
+                self._vectors[slot] = vector
+            self._evict(source)
+
+    def remove(self, source, row_ids):
+        """Drop rows; the last slot moves into each freed one so the matrix stays dense."""
+        with self._lock:
+            for row_id in row_ids:
+                slot = self._slots.pop((source, int(row_id)), None)
+                if slot is None:
+                    continue
+                last = len(self._keys) - 1
+                if slot != last:
+                    self._vectors[slot] = self._vectors[last]
+                    self._keys[slot] = self._keys[last]
+                    self._texts[slot] = self._texts[last]
+                    self._slots[self._keys[slot]] = slot
+                self._keys.pop()
+                self._texts.pop()
+
+    def _evict(self, source):
+        # Keep the newest max_rows rows of source
+        row_ids = [row_id for key_source, row_id in self._slots if key_source == source]
+        if len(row_ids) > self.max_rows:
+            row_ids.sort()
+            self.remove(source, row_ids[:len(row_ids) - self.max_rows])
+
+    def _index_newest(self, conn):
+        cursor = conn.cursor()
+        for source, (table_name, text_sql) in SOURCES.items():
+            before_id, indexed = 2 ** 63 - 1, 0
+            while indexed < self.max_rows:
+                cursor.execute(f"SELECT id, {text_sql} FROM {table_name} WHERE id < ? ORDER BY id DESC LIMIT ?",
+                               (before_id, min(SYNC_BATCH_SIZE, self.max_rows - indexed)))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                self.add(source, [row[0] for row in rows], [row[1] for row in rows])
+                before_id = rows[-1][0]
+                indexed += len(rows)
+
+    def _apply_changes(self, conn, last_change_id):
+        cursor = conn.cursor()
+        while True:
+            cursor.execute("""
+            SELECT change_id, source, row_id FROM retrieval_changes
+            WHERE change_id > ? ORDER BY change_id LIMIT ?
+            """, (last_change_id, SYNC_BATCH_SIZE))
+            changes = cursor.fetchall()
+            if not changes:
+                return last_change_id
+            for source, (table_name, text_sql) in SOURCES.items():
+                row_ids = sorted({row_id for _change_id, change_source, row_id in changes if change_source == source})
+                if not row_ids:
+                    continue
+                cursor.execute(f"SELECT id, {text_sql} FROM {table_name} WHERE id IN ({', '.join('?' * len(row_ids))})",
+                               row_ids)
+                rows = cursor.fetchall()
+                self.add(source, [row[0] for row in rows], [row[1] for row in rows])
+                # Changed rows that are gone were deleted
+                self.remove(source, set(row_ids) - {row[0] for row in rows})
+            last_change_id = changes[-1][0]
+
+    def sync(self, conn):
+        """
+        Bring the index up to date with the committed tables. The first call
+        (or one that fell behind the pruned change log, or further behind than
+        a full pass is long) embeds the newest rows of each table, later calls
+        only the rows changed since. Returns the
+        number of changes applied, or of rows embedded by a full pass.
+        """
+        cursor = conn.cursor()
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'retrieval_changes'")
+        row = cursor.fetchone()
+        newest_change = row[0] if row else 0
+        last_change_id = self._last_change_id
+        if last_change_id is not None:
+            if newest_change <= last_change_id:
+                return 0
+            cursor.execute("SELECT MIN(change_id) FROM retrieval_changes")
+            oldest = cursor.fetchone()[0]
+            if (oldest is not None and oldest <= last_change_id + 1
+                    and newest_change - last_change_id <= MAX_RETAINED_CHANGES):
+                self._last_change_id = self._apply_changes(conn, last_change_id)
+                return self._last_change_id - last_change_id
+        # Full pass; changes from here on are replayed afterwards (re-adding a row is harmless)
+        with self._lock:
+            self._keys, self._texts, self._slots = [], [], {}
+        self._index_newest(conn)
+        self._last_change_id = self._apply_changes(conn, newest_change)
+        return len(self)
+
+    def search(self, queries, k=5, sources=None, min_score=0.05):
+        """
+        Top-k cosine matches for each query, all queries in one matrix product
+        per chunk of the index.
+        Returns one list per query of {"source", "id", "score", "text"}, best first.
+        """
+        query_vectors = self.embedder.embed(list(queries))
+        with self._lock:
+            count = len(self._keys)
+            if count == 0:
+                return [[] for _ in queries]
+            scores = np.empty((len(query_vectors), count), dtype=np.float32)
+            for start in range(0, count, SEARCH_CHUNK_ROWS):
+                chunk = self._vectors[start:min(start + SEARCH_CHUNK_ROWS, count)].astype(np.float32)
+                scores[:, start:start + len(chunk)] = query_vectors @ chunk.T
+            keys = list(self._keys)
+            texts = list(self._texts)
+        if sources:
+            allowed = np.array([source in sources for source, _ in keys])
+            scores[:, ~allowed] = -1.0
+        k = min(k, count)
+        # argpartition finds the k best without sorting every score
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates])]
+            results.append([
+                {"source": keys[slot][0], "id": keys[slot][1], "score": float(scores[row, slot]), "text": texts[slot]}
+                for slot in ordered if scores[row, slot] >= min_score
+            ])
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+_index_changed = threading.Event()
+
+
+def get_vector_index():
+    # One index per process
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VectorIndex()
+        return _index
+
+
+def notify_index_changed():
+    """Wake the index builder; write functions call it once their rows have committed."""
+    _index_changed.set()
+
+
+def prune_retrieval_changes(conn, retention_seconds=CHANGE_RETENTION_SECONDS, max_changes=MAX_RETAINED_CHANGES):
+    """
+    Delete changes older than retention_seconds and all but the newest
+    max_changes. Called by the index builder and by the CLI after its CSV
+    ingest, so the log stays bounded without a running index. Returns the
+    number of changes deleted.
+    """
+    with conn:
+        cursor = conn.execute("""
+        DELETE FROM retrieval_changes
+        WHERE changed_at < ?
+           OR change_id <= (SELECT seq FROM sqlite_sequence WHERE name = 'retrieval_changes') - ?
+        """, (time.time() - retention_seconds, max_changes))
+    return cursor.rowcount
+
+
+def start_index_builder(db_path, interval_seconds=30):
+    """
+    Daemon thread that builds the vector index, then syncs it whenever
+    notify_index_changed() is called or every interval_seconds (writes from
+    other processes); set the returned Event to stop it.
+    """
+    stop = threading.Event()
+
+    def run():
+        conn = connect_database(db_path)
+        index = get_vector_index()
+        try:
+            while not stop.is_set():
+                _index_changed.clear()
+                try:
+                    index.sync(conn)
+                    prune_retrieval_changes(conn)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Vector index sync failed: {e}")
+                _index_changed.wait(interval_seconds)
+        finally:
+            conn.close()
+
+    threading.Thread(target=run, name="vector-index-builder", daemon=True).start()
+    return stop
+
+
+def retrieve(queries, k=5, sources=None):
+    """Search the process's index as built so far; never embeds table rows itself."""
+    return get_vector_index().search(queries, k=k, sources=sources)
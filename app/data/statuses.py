@@ -0,0 +1,2 @@
+# Ticket and incident statuses that count as done, shared by every SQL and pandas filter
+RESOLVED_STATUSES = ("Resolved", "Closed")
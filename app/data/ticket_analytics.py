@@ -0,0 +1,73 @@
+import pandas as pd
+from app.data.query_cache import cached_query
+from app.data.statuses import RESOLVED_STATUSES
+
+# One pass over it_tickets: per-assignee counts plus nearest-rank percentiles
+# of resolution hours taken with window functions
+STAFF_PERFORMANCE_SQL = """
+WITH filtered AS (
+    SELECT
+        COALESCE(assigned_to, 'Unassigned') AS assigned_to,
+        status IN ({resolved}) AS is_resolved,
+        CASE WHEN status IN ({resolved}) AND resolved_date IS NOT NULL
+             THEN (julianday(resolved_date) - julianday(created_date)) * 24
+        END AS hours
+    FROM it_tickets
+    WHERE {where}
+),
+ranked AS (
+    SELECT
+        assigned_to,
+        hours,
+        ROW_NUMBER() OVER (PARTITION BY assigned_to ORDER BY hours) AS rn,
+        COUNT(*) OVER (PARTITION BY assigned_to) AS n
+    FROM filtered
+    WHERE hours IS NOT NULL
+)
+SELECT
+    totals.assigned_to,
+    totals.assigned,
+    totals.resolved,
+    totals.mean_hours,
+    pct.p50_hours,
+    pct.p90_hours
+FROM (
+    SELECT assigned_to, COUNT(*) AS assigned, SUM(is_resolved) AS resolved, AVG(hours) AS mean_hours
+    FROM filtered
+    GROUP BY assigned_to
+) AS totals
+LEFT JOIN (
+    SELECT
+        assigned_to,
+        MIN(CASE WHEN rn >= 0.5 * n THEN hours END) AS p50_hours,
+        MIN(CASE WHEN rn >= 0.9 * n THEN hours END) AS p90_hours
+    FROM ranked
+    GROUP BY assigned_to
+) AS pct USING (assigned_to)
+ORDER BY totals.assigned DESC
+"""
+
+
+@cached_query("it_tickets")
+def get_staff_performance(conn, start_date=None, end_date=None):
+    """
+    Per assignee: tickets assigned and resolved, resolution rate (%), and
+    mean / p50 / p90 resolution time in hours, for tickets created in
+    [start_date, end_date] (either bound optional, 'YYYY-MM-DD').
+    """
+    where = ["1 = 1"]
+    params = list(RESOLVED_STATUSES) * 2
+    if start_date:
+        where.append("created_date >= ?")
+        params.append(str(start_date))
+    if end_date:
+        # Inclusive of the whole end day
+        where.append("created_date < date(?, '+1 day')")
+        params.append(str(end_date))
+    query = STAFF_PERFORMANCE_SQL.format(
+        resolved=", ".join("?" * len(RESOLVED_STATUSES)),
+        where=" AND ".join(where)
+    )
+    df = pd.read_sql_query(query, conn, params=params)
+    df.insert(3, "resolution_rate", (df["resolved"] / df["assigned"] * 100).round(1))
+    return df.round({"mean_hours": 1, "p50_hours": 1, "p90_hours": 1})
@@ -1,5 +1,17 @@
 import pandas as pd
-from app.data.db import connect_database
+from app.data.db import connect_database, on_commit
+from app.data.pagination import fetch_page
+from app.data.query_advisor import register_query
+from app.data.query_cache import cached_query, invalidates
+from app.data.retrieval import notify_index_changed
+
+SELECT_ALL_TICKETS_SQL = register_query("get_all_tickets", """
+    SELECT *
+    FROM it_tickets
+    ORDER BY created_at DESC
+    """)
+
+@invalidates("it_tickets")
 def insert_ticket(conn, priority, status, category, subject, description, created_date, resolved_date, assigned_to):
     # Insert new incident
     cursor = conn.cursor()
@@ -16,13 +28,16 @@ def insert_ticket(conn, priority, status, category, subject, description, create
     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
     """
     cursor.execute(insert_dataset_metadata_sql, (priority, status, category, subject, description, created_date, resolved_date, assigned_to))
+    on_commit(conn, notify_index_changed)
     return cursor.lastrowid
 
+@cached_query("it_tickets")
 def get_all_tickets(conn):
     # Get all incidents as DataFrame
-    select_data_sql = """
-    SELECT *
-    FROM it_tickets
-    ORDER BY created_at DESC
-    """
-    return pd.read_sql_query(select_data_sql, conn)
\ No newline at end of file
+    return pd.read_sql_query(SELECT_ALL_TICKETS_SQL, conn)
+
+@cached_query("it_tickets")
+def get_tickets_page(conn, columns=None, filters=None, page_size=50, page_token=None):
+    # Most recently created tickets first, returns (DataFrame, next_page_token)
+    return fetch_page(conn, "it_tickets", columns=columns, filters=filters,
+                      order_by="created_at", page_size=page_size, page_token=page_token)
@@ -1,4 +1,12 @@
 from app.data.db import connect_database
+from app.data.query_advisor import register_query
+
+USER_BY_USERNAME_SQL = register_query("get_user_by_username", """
+    SELECT *
+    FROM users
+    WHERE username = ?
+    """, ("alice",))
+
 def insert_user(conn, username, password_hash, role='user'):
     # Insert new user
     cursor = conn.cursor()
@@ -12,14 +20,28 @@ def insert_user(conn, username, password_hash, role='user'):
     cursor.execute(insert_data_sql, (username, password_hash, role))
     return cursor.lastrowid
 
+def insert_users(conn, rows):
+    # Bulk insert (username, password_hash, role) rows, existing usernames are ignored
+    cursor = conn.cursor()
+    insert_data_sql = """
+    INSERT OR IGNORE INTO users (
+        username,
+        password_hash,
+        role
+    ) VALUES (?, ?, ?)
+    """
+    cursor.executemany(insert_data_sql, rows)
+    return cursor.rowcount
+
+def get_all_usernames(conn):
+    # All usernames as a set, for O(1) duplicate checks during imports
+    cursor = conn.cursor()
+    cursor.execute("SELECT username FROM users")
+    return {row[0] for row in cursor.fetchall()}
+
 def get_user_by_username(conn, username):
     # Retrieve user by username.
     cursor = conn.cursor()
-    query = """
-    SELECT *
-    FROM users
-    WHERE username = ?
-    """
-    cursor.execute(query, (username,))
+    cursor.execute(USER_BY_USERNAME_SQL, (username,))
     user = cursor.fetchone()
     return user
\ No newline at end of file
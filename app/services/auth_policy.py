@@ -0,0 +1,103 @@
+"""
+bcrypt cost policy.
+
+The cost factor is picked once per process by timing this machine, so a
+verify takes about TARGET_VERIFY_MS whatever the hardware. Hashes below that
+cost are upgraded on the next successful login, and every verify is recorded
+in a latency histogram so login p99 can be watched.
+"""
+import bisect
+import os
+import threading
+import time
+import bcrypt
+
+TARGET_VERIFY_MS = float(os.environ.get("BCRYPT_TARGET_MS", 250))
+MIN_BCRYPT_ROUNDS = 10
+MAX_BCRYPT_ROUNDS = 16
+
+_chosen_rounds = None
+_rounds_lock = threading.Lock()
+
+
+def benchmark_bcrypt_rounds(target_ms=TARGET_VERIFY_MS, min_rounds=MIN_BCRYPT_ROUNDS, max_rounds=MAX_BCRYPT_ROUNDS):
+    # Time one hash at min_rounds; every extra round doubles the work
+    started = time.perf_counter()
+    bcrypt.hashpw(b"benchmark", bcrypt.gensalt(min_rounds))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+
+def choose_bcrypt_rounds():
+    """Cost factor for new hashes: BCRYPT_ROUNDS if set, otherwise benchmarked once."""
+    global _chosen_rounds
+    with _rounds_lock:
+        if _chosen_rounds is None:
+            env_rounds = os.environ.get("BCRYPT_ROUNDS")
+            _chosen_rounds = int(env_rounds) if env_rounds else benchmark_bcrypt_rounds()
+        return _chosen_rounds
+
+
+def get_hash_rounds(hashed):
+    # "$2b$12$<salt+hash>" -> 12, None when it is not a bcrypt hash
+    parts = hashed.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(hashed, rounds=None):
+    current = get_hash_rounds(hashed)
+    return current is None or current < (rounds or choose_bcrypt_rounds())
+
+
+class LatencyHistogram:
+    # Fixed millisecond buckets; the last bucket catches everything slower
+    BOUNDS_MS = [1, 2, 5, 10, 25, 50, 100, 150, 250, 400, 600, 1000, 2500, 5000]
+
+    def __init__(self):
+        self._counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self._total = 0
+        self._sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ms):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.BOUNDS_MS, elapsed_ms)] += 1
+            self._total += 1
+            self._sum_ms += elapsed_ms
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th percentile (q in 0-100)
+        with self._lock:
+            if not self._total:
+                return None
+            rank = q / 100 * self._total
+            seen = 0
+            for i, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank:
+                    return self.BOUNDS_MS[i] if i < len(self.BOUNDS_MS) else float("inf")
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={bound}ms" for bound in self.BOUNDS_MS] + [f">{self.BOUNDS_MS[-1]}ms"]
+            return {
+                "count": self._total,
+                "mean_ms": self._sum_ms / self._total if self._total else None,
+                "buckets": dict(zip(labels, self._counts)),
+            }
+
+
+VERIFY_LATENCY = LatencyHistogram()
+
+
+def get_verify_latency_stats():
+    stats = VERIFY_LATENCY.snapshot()
+    stats["p50_ms"] = VERIFY_LATENCY.percentile(50)
+    stats["p99_ms"] = VERIFY_LATENCY.percentile(99)
+    return stats
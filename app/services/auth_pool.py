@@ -0,0 +1,107 @@
+"""
+Worker pool for bcrypt hashing and verification.
+
+bcrypt releases the GIL while it works, so a thread pool spreads logins over
+every core instead of running them one by one on the request thread. The
+number of queued + running jobs is capped; beyond that a submit waits at
+most `wait` seconds for a slot and then raises AuthPoolBusyError, so a
+login storm cannot pile up unbounded work.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+
+class AuthPoolBusyError(RuntimeError):
+    pass
+
+
+class AuthWorkerPool:
+    def __init__(self, workers=None, max_queue=64, rounds=12):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="auth")
+        self._slots = threading.BoundedSemaphore(self.workers + max_queue)
+        self._lock = threading.Lock()
+        self._metrics = {"submitted": 0, "completed": 0, "rejected": 0, "pending": 0, "peak_pending": 0}
+
+    def _submit(self, fn, *args, wait=0):
+        # wait > 0 blocks up to that many seconds for a free slot
+        acquired = self._slots.acquire(timeout=wait) if wait else self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self._metrics["rejected"] += 1
+            raise AuthPoolBusyError(f"Auth queue full ({self.workers + self.max_queue} jobs)")
+        with self._lock:
+            self._metrics["submitted"] += 1
+            self._metrics["pending"] += 1
+            self._metrics["peak_pending"] = max(self._metrics["peak_pending"], self._metrics["pending"])
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, _future):
+        self._slots.release()
+        with self._lock:
+            self._metrics["completed"] += 1
+            self._metrics["pending"] -= 1
+
+    @staticmethod
+    def _hash(password, rounds):
+        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+    @staticmethod
+    def _verify(password, hashed):
+        try:
+            return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+        except ValueError:
+            # Malformed stored hash
+            return False
+
+    def submit_hash(self, password, rounds=None, wait=0):
+        """Future resolving to the bcrypt hash of password (str)."""
+        return self._submit(self._hash, password, rounds or self.rounds, wait=wait)
+
+    def submit_verify(self, password, hashed, wait=0):
+        """Future resolving to True when password matches hashed."""
+        return self._submit(self._verify, password, hashed, wait=wait)
+
+    def hash_password(self, password, rounds=None, timeout=30):
+        return self.submit_hash(password, rounds, wait=timeout).result(timeout)
+
+    def verify_password(self, password, hashed, timeout=30):
+        return self.submit_verify(password, hashed, wait=timeout).result(timeout)
+
+    def verify_many(self, pairs, timeout=30):
+        # [(password, hashed), ...] -> [bool, ...], checked in parallel
+        futures = [self.submit_verify(password, hashed, wait=timeout) for password, hashed in pairs]
+        return [future.result(timeout) for future in futures]
+
+    async def hash_async(self, password, rounds=None):
+        return await asyncio.wrap_future(self.submit_hash(password, rounds))
+
+    async def verify_async(self, password, hashed):
+        return await asyncio.wrap_future(self.submit_verify(password, hashed))
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._metrics, workers=self.workers, max_queue=self.max_queue)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_auth_pool = None
+_auth_pool_lock = threading.Lock()
+
+
+def get_auth_pool():
+    # One pool per process, shared by the CLI and every Streamlit session
+    global _auth_pool
+    with _auth_pool_lock:
+        if _auth_pool is None:
+            from app.services.auth_policy import choose_bcrypt_rounds
+            _auth_pool = AuthWorkerPool(rounds=choose_bcrypt_rounds())
+        return _auth_pool
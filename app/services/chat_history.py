@@ -0,0 +1,168 @@
+"""
+Persistent AI Assistant conversations.
+
+Messages are only ever appended (one INSERT each, plus a counter update on
+the conversation row) and read back newest-first in pages of PAGE_SIZE, so
+reopening a long conversation costs the same as a short one. The retention
+job rewrites history in bulk: conversations idle for COMPACT_AFTER_DAYS keep
+their newest COMPACT_KEEP_MESSAGES messages and fold the rest into a short
+text summary, and conversations idle for RETENTION_DAYS are deleted.
+"""
+import sqlite3
+import threading
+import time
+from app.data.db import connect_database
+from app.services.context_builder import summarize_turn
+
+PAGE_SIZE = 20
+# Messages kept in session state and rendered on every rerun
+RENDER_LIMIT = 50
+COMPACT_AFTER_DAYS = 14
+COMPACT_KEEP_MESSAGES = 20
+RETENTION_DAYS = 180
+SUMMARY_MAX_CHARS = 4000
+
+
+def start_conversation(conn, username, domain=None):
+    now = time.time()
+    with conn:
+        cursor = conn.execute("""
+        INSERT INTO chat_conversations (username, domain, created_at, updated_at)
+        VALUES (?, ?, ?, ?)
+        """, (username, domain, now, now))
+    return cursor.lastrowid
+
+
+def append_message(conn, conversation_id, role, content):
+    """Append one message, returns its id. The first user message becomes the title."""
+    now = time.time()
+    with conn:
+        cursor = conn.execute("""
+        INSERT INTO chat_messages (conversation_id, role, content, created_at)
+        VALUES (?, ?, ?, ?)
+        """, (conversation_id, role, content, now))
+        conn.execute("""
+        UPDATE chat_conversations
+        SET message_count = message_count + 1,
+            updated_at = ?,
+            title = COALESCE(title, CASE WHEN ? = 'user' THEN substr(?, 1, 60) END)
+        WHERE id = ?
+        """, (now, role, content, conversation_id))
+    return cursor.lastrowid
+
+
+def get_latest_conversation(conn, username):
+    """Most recently active conversation of username as a dict, or None."""
+    cursor = conn.cursor()
+    cursor.execute("""
+    SELECT id, domain, title, summary, message_count
+    FROM chat_conversations
+    WHERE username = ?
+    ORDER BY updated_at DESC
+    LIMIT 1
+    """, (username,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip(["id", "domain", "title", "summary", "message_count"], row))
+
+
+def list_conversations(conn, username, limit=20):
+    cursor = conn.cursor()
+    cursor.execute("""
+    SELECT id, domain, title, message_count, updated_at
+    FROM chat_conversations
+    WHERE username = ?
+    ORDER BY updated_at DESC
+    LIMIT ?
+    """, (username, limit))
+    return [dict(zip(["id", "domain", "title", "message_count", "updated_at"], row)) for row in cursor.fetchall()]
+
+
+def load_messages(conn, conversation_id, before_id=None, limit=PAGE_SIZE):
+    """
+    The newest `limit` messages older than before_id (newest overall when None).
+    Returns (messages oldest first as {"id", "role", "content"}, has_older).
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+    SELECT id, role, content
+    FROM chat_messages
+    WHERE conversation_id = ? AND id < ?
+    ORDER BY id DESC
+    LIMIT ?
+    """, (conversation_id, before_id if before_id is not None else 2 ** 63 - 1, limit + 1))
+    rows = cursor.fetchall()
+    has_older = len(rows) > limit
+    messages = [{"id": row[0], "role": row[1], "content": row[2]} for row in rows[:limit]]
+    messages.reverse()
+    return messages, has_older
+
+
+def compact_conversations(conn, now=None):
+    """
+    Retention job: delete conversations idle RETENTION_DAYS, compact the ones
+    idle COMPACT_AFTER_DAYS. Returns {"deleted", "compacted", "messages_removed"}.
+    """
+    now = now or time.time()
+    result = {"deleted": 0, "compacted": 0, "messages_removed": 0}
+    with conn:
+        # chat_messages rows go with them (ON DELETE CASCADE)
+        cursor = conn.execute("DELETE FROM chat_conversations WHERE updated_at < ?",
+                              (now - RETENTION_DAYS * 86400,))
+        result["deleted"] = cursor.rowcount
+
+    cursor = conn.cursor()
+    cursor.execute("""
+    SELECT id, summary FROM chat_conversations
+    WHERE updated_at < ? AND message_count > ?
+    """, (now - COMPACT_AFTER_DAYS * 86400, COMPACT_KEEP_MESSAGES))
+    for conversation_id, summary in cursor.fetchall():
+        keep, _ = load_messages(conn, conversation_id, limit=COMPACT_KEEP_MESSAGES)
+        if not keep:
+            continue
+        oldest_kept = keep[0]["id"]
+        old_rows = conn.execute("""
+        SELECT role, content FROM chat_messages
+        WHERE conversation_id = ? AND id < ?
+        ORDER BY id
+        """, (conversation_id, oldest_kept)).fetchall()
+        if not old_rows:
+            continue
+        lines = (summary.splitlines() if summary else []) + [summarize_turn(role, content) for role, content in old_rows]
+        # Newest summary lines win when the summary gets too long
+        kept, size = [], 0
+        for line in reversed(lines):
+            size += len(line) + 1
+            if kept and size > SUMMARY_MAX_CHARS:
+                break
+            kept.append(line)
+        new_summary = "\n".join(reversed(kept))
+        with conn:
+            deleted = conn.execute("DELETE FROM chat_messages WHERE conversation_id = ? AND id < ?",
+                                   (conversation_id, oldest_kept)).rowcount
+            conn.execute("""
+            UPDATE chat_conversations SET summary = ?, message_count = message_count - ? WHERE id = ?
+            """, (new_summary, deleted, conversation_id))
+        result["compacted"] += 1
+        result["messages_removed"] += deleted
+    return result
+
+
+def start_chat_retention_job(db_path, interval_seconds=6 * 60 * 60):
+    """Daemon thread running compact_conversations every interval_seconds; set the returned Event to stop it."""
+    stop = threading.Event()
+
+    def run():
+        conn = connect_database(db_path)
+        try:
+            while not stop.wait(interval_seconds):
+                try:
+                    compact_conversations(conn)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Chat history compaction failed: {e}")
+        finally:
+            conn.close()
+
+    threading.Thread(target=run, name="chat-retention", daemon=True).start()
+    return stop
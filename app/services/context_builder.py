@@ -0,0 +1,169 @@
+"""
+Prompt assembly for the AI Assistant with a bounded token budget.
+
+The newest messages go in verbatim, newest first, until the budget is
+spent. Everything older is folded into a rolling summary: one short line
+per turn, computed once when the turn falls out of the window and kept on
+the builder (one builder per chat session). The summary is capped at
+summary_share of the budget, so its oldest lines are dropped as a session
+grows, and the prompt never grows past the budget however long the
+session runs. Once summarized, a turn stays summarized, so the prompt
+prefix is stable from one question to the next. Retrieved reference
+records, when given, go right after the system prompt and are capped at
+reference_share of the budget.
+
+Token counts are estimated at CHARS_PER_TOKEN characters per token, which
+is close enough for English text to keep well clear of the model limit.
+"""
+import math
+
+CHARS_PER_TOKEN = 4
+DEFAULT_BUDGET_TOKENS = 3000
+# Model context window, prompt budget + answer (max_tokens) must fit in it
+CONTEXT_WINDOW_TOKENS = 32000
+TRUNCATION_MARKER = "\n[... truncated ...]\n"
+# Older summary lines could never fit the summary share anyway
+MAX_SUMMARY_LINES = 256
+SUMMARY_LINE_WORDS = 24
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def _format_message(message):
+    speaker = "User" if message["role"] == "user" else "Assistant"
+    return f"{speaker}: {message['content']}\n"
+
+
+def summarize_turn(role, content, words=SUMMARY_LINE_WORDS):
+    """One summary line for a turn; also used when stored history is compacted."""
+    parts = content.split()
+    text = " ".join(parts[:words]) + (" ..." if len(parts) > words else "")
+    return f"- {'User asked' if role == 'user' else 'Assistant answered'}: {text}"
+
+
+def _truncate_middle(text, max_tokens):
+    # Keep the start and the end of a long paste, they carry the question
+    max_chars = max(max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER), 0)
+    if len(text) <= max_chars:
+        return text
+    head = max_chars // 2
+    return text[:head] + TRUNCATION_MARKER + text[len(text) - (max_chars - head):]
+
+
+class ContextBuilder:
+    def __init__(self, budget_tokens=DEFAULT_BUDGET_TOKENS, summary_share=0.25, reference_share=0.25,
+                 summary_line_words=SUMMARY_LINE_WORDS):
+        self.budget_tokens = budget_tokens
+        self.summary_share = summary_share
+        self.reference_share = reference_share
+        self.summary_line_words = summary_line_words
+        self._summary_lines = []
+        self._summarized = 0  # messages[:_summarized] are in the summary
+
+    def reset(self, summary_lines=None, summarized=0, messages=None):
+        """
+        Resume a conversation from its stored summary and message offset.
+        messages: turns before the offset that are in neither the summary nor
+        the caller's window (not compacted yet), oldest first; summarized now.
+        """
+        self._summary_lines = list(summary_lines or []) + [self._summarize(m) for m in messages or []]
+        del self._summary_lines[:-MAX_SUMMARY_LINES]
+        self._summarized = summarized
+
+    def _summarize(self, message):
+        return summarize_turn(message["role"], message["content"], self.summary_line_words)
+
+    def _summary_block(self, max_tokens):
+        # Newest summary lines win when the summary is over its share
+        lines = []
+        used = estimate_tokens("Summary of earlier conversation:\n\n")
+        for line in reversed(self._summary_lines):
+            cost = estimate_tokens(line + "\n")
+            if used + cost > max_tokens:
+                break
+            lines.append(line)
+            used += cost
+        if not lines:
+            return ""
+        return "Summary of earlier conversation:\n" + "\n".join(reversed(lines)) + "\n\n"
+
+    def _reference_block(self, references, max_tokens):
+        # references arrive best first, keep as many as fit
+        lines = []
+        used = estimate_tokens("Relevant platform records:\n\n")
+        for reference in references:
+            line = f"- {reference}"
+            cost = estimate_tokens(line + "\n")
+            if used + cost > max_tokens:
+                break
+            lines.append(line)
+            used += cost
+        if not lines:
+            return "", 0
+        return "Relevant platform records:\n" + "\n".join(lines) + "\n\n", len(lines)
+
+    def build(self, system_prompt, messages, budget_tokens=None, max_output_tokens=0, references=None,
+              start_index=0):
+        """
+        messages: the conversation, oldest first, ending with the new user prompt.
+        start_index: position of messages[0] in the whole conversation, when the
+                     caller only keeps its newest messages in memory.
+        references: optional retrieved record texts, best first.
+        Returns (prompt, stats).
+        """
+        budget = budget_tokens or self.budget_tokens
+        budget = min(budget, CONTEXT_WINDOW_TOKENS - max_output_tokens)
+        if start_index + len(messages) < self._summarized:
+            # Conversation was cleared
+            self.reset()
+        # Messages the caller dropped before they were summarized are skipped
+        self._summarized = max(self._summarized, start_index)
+        summarized = self._summarized - start_index
+
+        header = system_prompt + "\n\n"
+        reference_count = 0
+        if references:
+            block, reference_count = self._reference_block(references, int(budget * self.reference_share))
+            header += block
+        footer = "Assistant: "
+        available = budget - estimate_tokens(header) - estimate_tokens(footer)
+        pending = sum(estimate_tokens(_format_message(m)) for m in messages[summarized:])
+        if self._summary_lines or self._summarized or pending > available:
+            # Something is (or is about to be) summarized, keep room for it
+            available -= int(budget * self.summary_share)
+
+        # Newest first; the newest message always goes in, truncated if it alone is too long
+        window = []
+        truncated = False
+        for index in range(len(messages) - 1, summarized - 1, -1):
+            text = _format_message(messages[index])
+            cost = estimate_tokens(text)
+            if not window and cost > available:
+                text = _format_message(dict(messages[index], content=_truncate_middle(
+                    messages[index]["content"], max(available - estimate_tokens("Assistant: \n"), 0))))
+                cost = estimate_tokens(text)
+                truncated = True
+            elif cost > available:
+                break
+            window.append(text)
+            available -= cost
+        first_verbatim = len(messages) - len(window)
+
+        # Turns that no longer fit are summarized once and never re-enter verbatim
+        for message in messages[summarized:first_verbatim]:
+            self._summary_lines.append(self._summarize(message))
+        del self._summary_lines[:-MAX_SUMMARY_LINES]
+        self._summarized = max(self._summarized, start_index + first_verbatim)
+
+        summary = self._summary_block(int(budget * self.summary_share)) if self._summary_lines else ""
+        prompt = header + summary + "".join(reversed(window)) + footer
+        return prompt, {
+            "prompt_tokens": estimate_tokens(prompt),
+            "budget_tokens": budget,
+            "messages_verbatim": len(window),
+            "messages_summarized": self._summarized,
+            "truncated": truncated,
+            "references": reference_count,
+        }
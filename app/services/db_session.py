@@ -0,0 +1,76 @@
+import os
+import threading
+import streamlit as st
+from app.data.db import ConnectionPool, DB_PATH
+from app.services.session_service import start_session_sweeper, validate_session
+from app.services.chat_history import start_chat_retention_job
+from app.data.incident_anomalies import start_anomaly_refresh_job
+from app.data.retrieval import start_index_builder
+
+
+@st.cache_resource
+def get_connection_pool():
+    # One pool per Streamlit server process, shared by every session.
+    # Pages are read-heavy, so default to the dashboard profile unless DB_PROFILE says otherwise
+    return ConnectionPool(
+        DB_PATH,
+        max_size=int(os.environ.get("DB_POOL_SIZE", 8)),
+        acquire_timeout=float(os.environ.get("DB_POOL_TIMEOUT", 5)),
+        lease_idle_timeout=float(os.environ.get("DB_LEASE_IDLE_SECONDS", 900)),
+        profile=os.environ.get("DB_PROFILE", "dashboard")
+    )
+
+
+@st.cache_resource
+def get_session_sweeper():
+    # Started once per server process
+    return start_session_sweeper(DB_PATH)
+
+
+@st.cache_resource
+def get_chat_retention_job():
+    # Started once per server process
+    return start_chat_retention_job(DB_PATH)
+
+
+@st.cache_resource
+def get_anomaly_refresh_job():
+    # Started once per server process; pages never score anomalies themselves
+    return start_anomaly_refresh_job(DB_PATH, interval_seconds=float(os.environ.get("ANOMALY_REFRESH_SECONDS", 60)))
+
+
+@st.cache_resource
+def get_index_builder():
+    # Started once per server process, by the first page that retrieves records
+    return start_index_builder(DB_PATH)
+
+
+def get_connection():
+    """
+    Connection for the current script run. It is borrowed by the run's thread
+    and returns to the pool when the run ends, so idle browser sessions hold none.
+    """
+    get_session_sweeper()
+    get_chat_retention_job()
+    get_anomaly_refresh_job()
+    try:
+        return get_connection_pool().lease(threading.current_thread())
+    except TimeoutError:
+        st.error("⚠️ The server is busy, please retry in a moment")
+        st.stop()
+
+
+def require_session():
+    """
+    Connection for a logged-in page. Stops the script run when the session
+    token has expired or was revoked (e.g. "End Other Sessions" from another
+    browser).
+    """
+    conn = get_connection()
+    if not validate_session(conn, st.session_state.get("session_token")):
+        st.session_state.logged_in = False
+        st.error("Your session has expired, please log in again")
+        if st.button("Go to Login", key="session_expired_login"):
+            st.switch_page("Home.py")
+        st.stop()
+    return conn
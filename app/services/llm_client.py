@@ -0,0 +1,179 @@
+"""
+Streaming LLM client used by the AI Assistant page.
+
+A backend only has to turn a prompt into an iterator of text chunks. LLMClient
+drains that iterator on a worker thread and hands chunks to the caller
+through a queue, which lets it enforce a time-to-first-token and a total
+timeout even while the backend is blocked on the network, and stop the
+backend as soon as the request is cancelled (a newer prompt, or the caller
+abandoning the generator).
+
+Backends:
+    GeminiBackend   google-genai generate_content_stream
+    StubBackend     canned local reply with configurable delays, no network
+"""
+import os
+import queue
+import threading
+import time
+
+DEFAULT_MODEL = "models/gemini-2.0-flash-exp"
+
+
+class LLMTimeoutError(RuntimeError):
+    pass
+
+
+class LLMCancelledError(RuntimeError):
+    pass
+
+
+class GeminiBackend:
+    def __init__(self, api_key, model=DEFAULT_MODEL, timeout=30.0):
+        # Imported here so the stub backend works without google-genai installed
+        from google import genai
+        from google.genai import types
+
+        self._types = types
+        self.model = model
+        # HTTP-level timeout (ms), LLMClient enforces the overall deadline on top
+        self._client = genai.Client(api_key=api_key, http_options=types.HttpOptions(timeout=int(timeout * 1000)))
+
+    def stream(self, prompt, temperature=0.7, max_tokens=1000):
+        config = self._types.GenerateContentConfig(temperature=temperature, max_output_tokens=max_tokens)
+        for chunk in self._client.models.generate_content_stream(model=self.model, contents=prompt, config=config):
+            if chunk.text:
+                yield chunk.text
+
+
+class StubBackend:
+    """Local backend for tests and offline demos: echoes the prompt's last line word by word."""
+
+    def __init__(self, reply=None, first_token_delay=0.0, token_delay=0.0, model="stub"):
+        self.reply = reply
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.model = model
+
+    def stream(self, prompt, temperature=0.7, max_tokens=1000):
+        reply = self.reply
+        if reply is None:
+            last_line = prompt.strip().splitlines()[-1] if prompt.strip() else ""
+            reply = f"(stub) You asked: {last_line}"
+        time.sleep(self.first_token_delay)
+        for i, word in enumerate(reply.split(" ")[:max_tokens]):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield word if i == 0 else " " + word
+
+
+_DONE = object()
+
+
+class LLMClient:
+    def __init__(self, backend, first_token_timeout=15.0, timeout=60.0):
+        self.backend = backend
+        self.first_token_timeout = first_token_timeout
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._metrics = {"requests": 0, "completed": 0, "timeouts": 0, "cancelled": 0, "errors": 0,
+                         "last_first_token_ms": None, "last_total_ms": None}
+
+    @property
+    def model(self):
+        return self.backend.model
+
+    def _count(self, key):
+        with self._lock:
+            self._metrics[key] += 1
+
+    def _produce(self, chunks, prompt, temperature, max_tokens, cancel):
+        source = None
+        try:
+            source = self.backend.stream(prompt, temperature=temperature, max_tokens=max_tokens)
+            for chunk in source:
+                if cancel.is_set():
+                    break
+                chunks.put(chunk)
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            # Closing the generator closes the backend's HTTP stream
+            if source is not None and hasattr(source, "close"):
+                source.close()
+            chunks.put(_DONE)
+
+    def stream(self, prompt, temperature=0.7, max_tokens=1000, cancel_event=None):
+        """
+        Yield response text chunks as they arrive.
+        Raises LLMTimeoutError when the first chunk or the whole answer takes too
+        long, LLMCancelledError when cancel_event is set mid-stream.
+        """
+        cancel = cancel_event or threading.Event()
+        chunks = queue.Queue()
+        started = time.monotonic()
+        deadline = started + self.timeout
+        first_deadline = started + self.first_token_timeout
+        self._count("requests")
+        worker = threading.Thread(target=self._produce, args=(chunks, prompt, temperature, max_tokens, cancel),
+                                  name="llm-stream", daemon=True)
+        worker.start()
+
+        got_first = False
+        try:
+            while True:
+                if cancel.is_set():
+                    self._count("cancelled")
+                    raise LLMCancelledError("Request cancelled")
+                now = time.monotonic()
+                limit = deadline if got_first else min(deadline, first_deadline)
+                if now >= limit:
+                    self._count("timeouts")
+                    raise LLMTimeoutError(
+                        f"No response within {self.first_token_timeout}s" if not got_first
+                        else f"Response took longer than {self.timeout}s"
+                    )
+                try:
+                    # Short waits so cancellation is noticed promptly
+                    item = chunks.get(timeout=min(0.1, limit - now))
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    self._count("completed")
+                    with self._lock:
+                        self._metrics["last_total_ms"] = (time.monotonic() - started) * 1000
+                    return
+                if isinstance(item, Exception):
+                    self._count("errors")
+                    raise item
+                if not got_first:
+                    got_first = True
+                    with self._lock:
+                        self._metrics["last_first_token_ms"] = (time.monotonic() - started) * 1000
+                yield item
+        finally:
+            # Stops the worker on timeout, cancel, error or an abandoned generator
+            cancel.set()
+
+    def complete(self, prompt, temperature=0.7, max_tokens=1000, cancel_event=None):
+        return "".join(self.stream(prompt, temperature, max_tokens, cancel_event))
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._metrics)
+
+
+def create_llm_client(backend=None, api_key=None, model=DEFAULT_MODEL):
+    """
+    backend: "gemini" or "stub", defaults to the LLM_BACKEND env var, then "gemini".
+    The stub also honours LLM_STUB_FIRST_TOKEN_MS / LLM_STUB_TOKEN_MS to simulate latency.
+    """
+    name = backend or os.environ.get("LLM_BACKEND", "gemini")
+    if name == "stub":
+        return LLMClient(StubBackend(
+            first_token_delay=float(os.environ.get("LLM_STUB_FIRST_TOKEN_MS", 0)) / 1000,
+            token_delay=float(os.environ.get("LLM_STUB_TOKEN_MS", 0)) / 1000,
+        ))
+    if name == "gemini":
+        return LLMClient(GeminiBackend(api_key, model=model))
+    raise ValueError(f"Unknown LLM backend '{name}', expected 'gemini' or 'stub'")
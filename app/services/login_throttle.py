@@ -0,0 +1,144 @@
+"""
+Login rate limiting and lockout.
+
+State lives in the login_throttle table so the CLI and the Streamlit login
+share it and it survives restarts. Each username has a token bucket of
+MAX_ATTEMPTS tokens that refills at MAX_ATTEMPTS per WINDOW_SECONDS; every
+failure takes a token, and the failure that leaves less than one whole token
+locks the username for LOCKOUT_SECONDS, after which the bucket is full again.
+Unlike a fixed window, failures spread across a window boundary are still
+counted against each other. An in-process LRU answers repeat checks (most importantly
+for usernames that are already locked) without touching the database;
+failures are always counted in the database, atomically.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+MAX_ATTEMPTS = 3
+WINDOW_SECONDS = 5 * 60
+LOCKOUT_SECONDS = 5 * 60
+# Rows untouched for this long are deleted by the sweeper
+RETENTION_SECONDS = 24 * 60 * 60
+
+
+class LoginThrottle:
+    def __init__(self, max_attempts=MAX_ATTEMPTS, window_seconds=WINDOW_SECONDS,
+                 lockout_seconds=LOCKOUT_SECONDS, cache_size=1024, cache_ttl=2.0,
+                 sweep_every=500):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.lockout_seconds = lockout_seconds
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.sweep_every = sweep_every
+        self._cache = OrderedDict()  # username -> (tokens, refilled_at, locked_until, cached_at)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _cache_get(self, username, now):
+        with self._lock:
+            entry = self._cache.get(username)
+            if entry is None:
+                return None
+            tokens, refilled_at, locked_until, cached_at = entry
+            # A lockout cannot be lifted early by another process, so it stays valid until it ends
+            if locked_until > now or now - cached_at <= self.cache_ttl:
+                self._cache.move_to_end(username)
+                return tokens, refilled_at, locked_until
+            del self._cache[username]
+            return None
+
+    def _cache_put(self, username, state, now):
+        with self._lock:
+            self._cache[username] = (*state, now)
+            self._cache.move_to_end(username)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _load(self, conn, username, now):
+        state = self._cache_get(username, now)
+        if state is not None:
+            return state
+        cursor = conn.cursor()
+        cursor.execute("SELECT tokens, refilled_at, locked_until FROM login_throttle WHERE username = ?", (username,))
+        state = cursor.fetchone() or (self.max_attempts, now, 0)
+        self._cache_put(username, state, now)
+        return state
+
+    def check(self, conn, username):
+        """(allowed, seconds_until_unlocked)"""
+        now = time.time()
+        _tokens, _refilled_at, locked_until = self._load(conn, username, now)
+        if locked_until > now:
+            return False, int(locked_until - now) + 1
+        return True, 0
+
+    def record_failure(self, conn, username):
+        """Count a failed login, returns attempts left before lockout (0 = now locked)."""
+        now = time.time()
+        # One statement refills, takes a token and reads the stored row back,
+        # so concurrent failures (other sessions, other processes) are never
+        # lost. The cache is only refreshed from what the database returns.
+        expired = "(login_throttle.locked_until > 0 AND login_throttle.locked_until <= :now)"
+        # Tokens left after this failure; a new row or an ended lockout starts full
+        tokens = f"""(CASE WHEN {expired} OR login_throttle.tokens IS NULL THEN :capacity
+            ELSE MIN(:capacity, login_throttle.tokens + (:now - login_throttle.refilled_at) * :rate)
+        END - 1)"""
+        with conn:
+            state = conn.execute(f"""
+            INSERT INTO login_throttle (username, failures, window_start, locked_until, updated_at, tokens, refilled_at)
+            VALUES (:username, 1, :now, CASE WHEN :capacity - 1 < 1 THEN :now + :lockout ELSE 0 END, :now,
+                    :capacity - 1, :now)
+            ON CONFLICT(username) DO UPDATE SET
+                failures = CASE WHEN {expired} THEN 1 ELSE login_throttle.failures + 1 END,
+                locked_until = CASE
+                    WHEN {tokens} < 1 THEN :now + :lockout
+                    WHEN {expired} THEN 0
+                    ELSE login_throttle.locked_until
+                END,
+                tokens = MAX({tokens}, 0),
+                refilled_at = :now,
+                updated_at = :now
+            RETURNING tokens, refilled_at, locked_until
+            """, {"username": username, "now": now, "capacity": self.max_attempts,
+                  "rate": self.max_attempts / self.window_seconds, "lockout": self.lockout_seconds}).fetchone()
+        self._cache_put(username, state, now)
+        self._maybe_sweep(conn)
+        return int(state[0]) if state[2] <= now else 0
+
+    def record_success(self, conn, username):
+        with conn:
+            conn.execute("DELETE FROM login_throttle WHERE username = ?", (username,))
+        with self._lock:
+            self._cache.pop(username, None)
+
+    def _maybe_sweep(self, conn):
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.sweep_every == 0
+        if due:
+            self.purge_expired(conn)
+
+    def purge_expired(self, conn):
+        """Delete rows that are neither locked nor touched within RETENTION_SECONDS."""
+        now = time.time()
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM login_throttle WHERE updated_at < ? AND locked_until < ?",
+                (now - RETENTION_SECONDS, now)
+            )
+        return cursor.rowcount
+
+
+_login_throttle = None
+_login_throttle_lock = threading.Lock()
+
+
+def get_login_throttle():
+    # One throttle (and LRU) per process
+    global _login_throttle
+    with _login_throttle_lock:
+        if _login_throttle is None:
+            _login_throttle = LoginThrottle()
+        return _login_throttle
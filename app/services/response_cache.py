@@ -0,0 +1,131 @@
+"""
+Cache of AI assistant answers.
+
+Analysts ask the same questions again and again; a repeat is answered from
+here instead of a model round trip. The key is a SHA-256 of the model, the
+domain, the whitespace/case-normalized prompt context, temperature and
+max_tokens. Two tiers: an in-process LRU, then the ai_response_cache table
+(shared between processes, survives restarts). Entries live TTL_SECONDS.
+Requests above MAX_CACHEABLE_TEMPERATURE want varied answers and bypass the
+cache entirely.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+TTL_SECONDS = 24 * 60 * 60
+MAX_CACHEABLE_TEMPERATURE = float(os.environ.get("AI_CACHE_MAX_TEMPERATURE", 0.7))
+
+
+def normalize_context(text):
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def make_cache_key(model, domain, context, temperature, max_tokens):
+    payload = json.dumps([model, domain, normalize_context(context), round(float(temperature), 2), int(max_tokens)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, ttl_seconds=TTL_SECONDS, max_temperature=MAX_CACHEABLE_TEMPERATURE,
+                 memory_size=512, sweep_every=200):
+        self.ttl_seconds = ttl_seconds
+        self.max_temperature = max_temperature
+        self.memory_size = memory_size
+        self.sweep_every = sweep_every
+        self._memory = OrderedDict()  # key -> (response, expires_at)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "stores": 0}
+
+    def is_cacheable(self, temperature):
+        return temperature <= self.max_temperature
+
+    def _remember(self, key, response, expires_at):
+        with self._lock:
+            self._memory[key] = (response, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def get(self, conn, key, temperature):
+        """Cached response text, or None on a miss (and always for high temperatures)."""
+        if not self.is_cacheable(temperature):
+            with self._lock:
+                self._metrics["bypassed"] += 1
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                self._metrics["memory_hits"] += 1
+                return entry[0]
+            if entry is not None:
+                del self._memory[key]
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT response, expires_at FROM ai_response_cache WHERE cache_key = ? AND expires_at > ?",
+                       (key, now))
+        row = cursor.fetchone()
+        if row is None:
+            with self._lock:
+                self._metrics["misses"] += 1
+            return None
+        with conn:
+            conn.execute("UPDATE ai_response_cache SET hits = hits + 1 WHERE cache_key = ?", (key,))
+        self._remember(key, row[0], row[1])
+        with self._lock:
+            self._metrics["disk_hits"] += 1
+        return row[0]
+
+    def put(self, conn, key, domain, response, temperature):
+        if not self.is_cacheable(temperature) or not response:
+            return
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with conn:
+            conn.execute("""
+            INSERT INTO ai_response_cache (cache_key, domain, response, created_at, expires_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                response = excluded.response,
+                created_at = excluded.created_at,
+                expires_at = excluded.expires_at
+            """, (key, domain, response, now, expires_at))
+        self._remember(key, response, expires_at)
+        with self._lock:
+            self._metrics["stores"] += 1
+            self._writes += 1
+            due = self._writes % self.sweep_every == 0
+        if due:
+            self.purge_expired(conn)
+
+    def purge_expired(self, conn):
+        with conn:
+            cursor = conn.execute("DELETE FROM ai_response_cache WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+    def metrics(self):
+        with self._lock:
+            hits = self._metrics["memory_hits"] + self._metrics["disk_hits"]
+            lookups = hits + self._metrics["misses"]
+            return dict(self._metrics, memory_entries=len(self._memory),
+                        hit_rate=hits / lookups if lookups else 0.0)
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    # One cache (and LRU) per process
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
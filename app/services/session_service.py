@@ -0,0 +1,119 @@
+"""
+Server-side sessions.
+
+Only a SHA-256 of each token is stored. Expiry is sliding: a validated
+session is pushed forward, but at most once per REFRESH_SECONDS, so the
+check on every Streamlit rerun is normally a single indexed read.
+"""
+import hashlib
+import secrets
+import sqlite3
+import threading
+import time
+from app.data.db import connect_database
+
+SESSION_DURATION_MINUTES = 30
+REFRESH_SECONDS = 60
+
+
+def _hash_token(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+
+def create_session(conn, username, duration_minutes=SESSION_DURATION_MINUTES):
+    """Store a new session, returns (token, created_at, expires_at, duration_minutes)."""
+    token = secrets.token_hex(16)
+    created_at = time.time()
+    expires_at = created_at + (duration_minutes * 60)
+    with conn:
+        conn.execute("""
+        INSERT INTO sessions (token_hash, username, created_at, last_seen, expires_at)
+        VALUES (?, ?, ?, ?, ?)
+        """, (_hash_token(token), username, created_at, created_at, expires_at))
+    return (token, _format_time(created_at), _format_time(expires_at), duration_minutes)
+
+
+def validate_session(conn, token, duration_minutes=SESSION_DURATION_MINUTES):
+    """Username owning token, or None when it is unknown or expired."""
+    if not token:
+        return None
+    now = time.time()
+    token_hash = _hash_token(token)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT username, last_seen FROM sessions WHERE token_hash = ? AND expires_at > ?",
+        (token_hash, now)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    username, last_seen = row
+    if now - last_seen >= REFRESH_SECONDS:
+        with conn:
+            conn.execute(
+                "UPDATE sessions SET last_seen = ?, expires_at = ? WHERE token_hash = ?",
+                (now, now + duration_minutes * 60, token_hash)
+            )
+    return username
+
+
+def revoke_session(conn, token):
+    if not token:
+        return 0
+    with conn:
+        cursor = conn.execute("DELETE FROM sessions WHERE token_hash = ?", (_hash_token(token),))
+    return cursor.rowcount
+
+
+def revoke_user_sessions(conn, username, except_token=None):
+    """End all of username's sessions (but except_token's) in one statement."""
+    with conn:
+        cursor = conn.execute(
+            "DELETE FROM sessions WHERE username = ? AND token_hash != ?",
+            (username, _hash_token(except_token) if except_token else "")
+        )
+    return cursor.rowcount
+
+
+def count_active_sessions(conn, username):
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM sessions WHERE username = ? AND expires_at > ?", (username, time.time()))
+    return cursor.fetchone()[0]
+
+
+def purge_expired_sessions(conn, batch_size=500):
+    """Delete expired sessions batch_size rows per transaction, returns rows deleted."""
+    total = 0
+    while True:
+        with conn:
+            cursor = conn.execute("""
+            DELETE FROM sessions WHERE id IN (
+                SELECT id FROM sessions WHERE expires_at <= ? LIMIT ?
+            )
+            """, (time.time(), batch_size))
+        total += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            return total
+
+
+def start_session_sweeper(db_path, interval_seconds=300):
+    """Daemon thread purging expired sessions every interval_seconds; set the returned Event to stop it."""
+    stop = threading.Event()
+
+    def sweep():
+        conn = connect_database(db_path)
+        try:
+            while not stop.wait(interval_seconds):
+                try:
+                    purge_expired_sessions(conn)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Session sweep failed: {e}")
+        finally:
+            conn.close()
+
+    threading.Thread(target=sweep, name="session-sweeper", daemon=True).start()
+    return stop
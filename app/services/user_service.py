@@ -1,8 +1,17 @@
-import bcrypt
 import sqlite3
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from pathlib import Path
 from app.data.db import DATA_DIR
-from app.data.users import get_user_by_username, insert_user
+from app.data.users import get_user_by_username, insert_user, insert_users, get_all_usernames
+from app.services.auth_pool import get_auth_pool, AuthPoolBusyError
+from app.services.auth_policy import VERIFY_LATENCY, needs_rehash, get_hash_rounds
+from app.utility.user_validations import validate_username
+
+# Returned (as (False, SERVER_BUSY_MESSAGE)) when the auth pool is saturated;
+# not a wrong password, so callers must not count it as a failed login
+SERVER_BUSY_MESSAGE = "Server busy, please retry in a moment."
+AUTH_POOL_ERRORS = (AuthPoolBusyError, FuturesTimeoutError)
 
 def register_user(conn, username, password, role="user"):
     """Register new user with password hashing."""
@@ -13,10 +22,11 @@ def register_user(conn, username, password, role="user"):
     if cursor.fetchone():
         return False, f"Username '{username}' already exists."
     
-    password_encoded = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed_encoded = bcrypt.hashpw(password_encoded, salt)
-    hashed = hashed_encoded.decode('utf-8')
+    # Hashed on the auth worker pool
+    try:
+        hashed = get_auth_pool().hash_password(password)
+    except AUTH_POOL_ERRORS:
+        return False, SERVER_BUSY_MESSAGE
     
     insert_user(conn, username, hashed, role)
     conn.commit()
@@ -34,38 +44,84 @@ def login_user(conn, username, password):
     
     # Verify password (user[2] is password_hash column)
     hashed = user[2]
-    password_encoded = password.encode('utf-8')
-    hash_bytes = hashed.encode('utf-8')
     
-    if bcrypt.checkpw(password_encoded, hash_bytes):
+    started = time.perf_counter()
+    try:
+        is_valid = get_auth_pool().verify_password(password, hashed)
+    except AUTH_POOL_ERRORS:
+        return False, SERVER_BUSY_MESSAGE
+    VERIFY_LATENCY.record((time.perf_counter() - started) * 1000)
+
+    if is_valid:
+        # Upgrade hashes made with a lower cost factor while we have the plain password
+        if needs_rehash(hashed, get_auth_pool().rounds):
+            try:
+                cursor.execute(
+                    "UPDATE users SET password_hash = ? WHERE username = ?",
+                    (get_auth_pool().hash_password(password), username)
+                )
+                conn.commit()
+            except AUTH_POOL_ERRORS:
+                # The login itself succeeded, upgrade on a later one
+                pass
         return True, user[3]
     else:
         return False, "Incorrect password."
 
+def _parse_user_lines(lines, existing_usernames, counts):
+    # Yield (username, hash, role) rows that can be inserted, counting the rest
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split(',')
+        if len(parts) < 2:
+            counts["failed"] += 1
+            counts["errors"].append((line_no, "expected username,password_hash[,role]"))
+            continue
+        username = parts[0].strip()
+        hashed = parts[1].strip()
+        role = parts[2].strip() if len(parts) > 2 and parts[2].strip() else "user"
+        is_valid, msg = validate_username(username)
+        if not is_valid:
+            counts["failed"] += 1
+            counts["errors"].append((line_no, f"{username}: {msg}"))
+            continue
+        if get_hash_rounds(hashed) is None:
+            counts["failed"] += 1
+            counts["errors"].append((line_no, f"{username}: not a bcrypt hash"))
+            continue
+        if username in existing_usernames:
+            counts["skipped"] += 1
+            continue
+        # Later lines with the same username are skipped too
+        existing_usernames.add(username)
+        yield username, hashed, role
+
+
 def migrate_users_from_file(conn, filepath=DATA_DIR / "users.txt"):
+    """
+    Bulk import users from a username,password_hash,role file.
+    The file is read as a stream, usernames are checked with validate_username
+    and against one set of existing usernames, and every new user is inserted
+    with a single executemany in one transaction.
+    Returns {"inserted", "skipped", "failed", "errors": [(line_no, reason)]}.
+    """
+    counts = {"inserted": 0, "skipped": 0, "failed": 0, "errors": []}
     if not filepath.exists():
         print(f"⚠️  File not found: {filepath}")
         print("   No users to migrate.")
-        return
+        return counts
 
-    cursor = conn.cursor()
-    migrated_count = 0
-    
-    with open(filepath, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            parts = line.split(',')
-            if len(parts) >= 2:
-                username = parts[0]
-                hashed = parts[1]
-                role = parts[2]
-                try:
-                    insert_user(conn, username, hashed, role)
-                    conn.commit()
-                    if cursor.rowcount > 0:
-                        migrated_count += 1
-                except sqlite3.Error as e:
-                    print(f"Error migrating user {username}: {e}")
-    print(f"✅ Migrated {migrated_count} users from {filepath.name}")
+    existing_usernames = get_all_usernames(conn)
+    try:
+        with conn, open(filepath, 'r') as f:
+            counts["inserted"] = insert_users(conn, _parse_user_lines(f, existing_usernames, counts))
+    except sqlite3.Error as e:
+        print(f"❌ Error migrating users from {filepath.name}: {e}")
+        counts["inserted"] = 0
+        counts["errors"].append((None, f"transaction rolled back: {e}"))
+        return counts
+    print(f"✅ Migrated {counts['inserted']} users from {filepath.name} "
+          f"(skipped {counts['skipped']}, failed {counts['failed']})")
+    return counts
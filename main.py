@@ -1,28 +1,22 @@
 #!/usr/bin/python
 from app.utility.user_validations import validate_username, validate_password
 from app.data.db import connect_database
-from app.data.loaddata import load_csv_to_table_cyber_incident, load_csv_to_table_datasets_metadata, load_csv_to_table_it_tickets
+from app.data.loaddata import sync_csv_to_table_cyber_incident, load_csv_to_table_datasets_metadata, load_csv_to_table_it_tickets
 from pathlib import Path
 from app.data.db import DATA_DIR
-from app.data.schema import create_all_tables
-from app.services.user_service import register_user, login_user, migrate_users_from_file
+from app.data.migrate import migrate
+from app.data.incident_anomalies import refresh_anomalies
+from app.data.retrieval import prune_retrieval_changes
+from app.services.user_service import register_user, login_user, migrate_users_from_file, SERVER_BUSY_MESSAGE
+from app.services.auth_policy import choose_bcrypt_rounds
+from app.services.login_throttle import get_login_throttle
+from app.services.session_service import create_session, revoke_session
 from app.data.incidents import insert_incident, get_all_incidents
-import sys, select, secrets, os, time
+import sys, select, os, time
 import pandas as pd
 from app.data.db import DATA_DIR
 
 
-def create_session():
-    MAX_SESSION_DURATION = 5 # in minutes
-    token = secrets.token_hex(16)
-    # Store token with timestamp
-    created_at = time.time()
-    expires_at = created_at + (MAX_SESSION_DURATION * 60)
-    created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at))
-    expires_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(expires_at))
-    return (token, created_at, expires_at, MAX_SESSION_DURATION)
-
-
 def display_menu():
 
     print("\nWelcome to the Week 7 Authentication System!")
@@ -41,15 +35,19 @@ def main():
     conn = connect_database()
 
 
-    create_all_tables(conn)
+    migrate(conn)
+    # Benchmark bcrypt now rather than on the first login
+    print(f"bcrypt cost factor: {choose_bcrypt_rounds()}")
     migrate_users_from_file(conn)
 
     ACCOUNT_ROLES = ["user", "admin", "analyst"]
-    LOCKOUT_DURATION = 5
-    login_moderator = {"Username": [], "Attempts_Left": [], "Inital_Time_Locked": []}
-    load_csv_to_table_cyber_incident(conn, DATA_DIR / "cyber_incidents.csv", "cyber_incidents")
+    login_throttle = get_login_throttle()
+    sync_csv_to_table_cyber_incident(conn, DATA_DIR / "cyber_incidents.csv", "cyber_incidents")
     load_csv_to_table_datasets_metadata(conn, DATA_DIR / "datasets_metadata.csv", "datasets_metadata")
     load_csv_to_table_it_tickets(conn, DATA_DIR / "it_tickets.csv", "it_tickets")
+    print(f"Incident surges flagged: {refresh_anomalies(conn)}")
+    # The ingest logged every row for the vector index; keep that log bounded
+    prune_retrieval_changes(conn)
 
     while True:
         display_menu()
@@ -99,24 +97,18 @@ def main():
             # Login flow
             print("\n--- USER LOGIN ---")
             username=input("Enter your username: ").strip()
-            if username not in login_moderator["Username"]:
-                login_moderator["Username"].append(username)
-                login_moderator["Attempts_Left"].append(3)
-                login_moderator["Inital_Time_Locked"].append(0)
-                log_mod_i = login_moderator["Username"].index(username)
-            elif login_moderator["Inital_Time_Locked"][log_mod_i] != 0:
-                log_mod_i = login_moderator["Username"].index(username)
-                if time.time() < (login_moderator["Inital_Time_Locked"][log_mod_i] + (LOCKOUT_DURATION * 60)):
-                    print("You are currently locked out")
-                    continue
-                else:
-                    print("The lockout duraction has ended!! You may attempt to log in again (max attemps 3)")
+            allowed, wait_seconds = login_throttle.check(conn, username)
+            if not allowed:
+                print(f"You are currently locked out, try again in {wait_seconds} seconds")
+                continue
 
             password=input("Enter your password: ").strip()
             # Attempt login
             is_valid, role = login_user(conn, username,password)
             if is_valid:
-                _token,_created_at,_expires_at, session_duration = create_session()
+                login_throttle.record_success(conn, username)
+                MAX_SESSION_DURATION = 5 # in minutes
+                _token,_created_at,_expires_at, session_duration = create_session(conn, username, MAX_SESSION_DURATION)
                 print("\nYou are logged-in as:")
                 print(f"\tUSER: {username}")
                 print(f"\tROLE: {role}")
@@ -128,10 +120,8 @@ def main():
                 # GO TO https://stackoverflow.com/questions/1335507/keyboard-input-with-timeout to re read
                 print("\nPress Enter to return to main menu... or wait duration of session expiration")
                 i, o, e = select.select( [sys.stdin], [], [], (session_duration * 60))
+                revoke_session(conn, _token)
                 print("Session ended")
-                login_moderator["Username"].pop(log_mod_i)
-                login_moderator["Attempts_Left"].pop(log_mod_i)
-                login_moderator["Inital_Time_Locked"].pop(log_mod_i)
                 incident_id = insert_incident(conn,
                                               "2024-11-05",
                                               "Phishing",
@@ -141,13 +131,13 @@ def main():
                                               "alice"
                                               )
                 print(f"Created incident #{incident_id}")
+            elif role == SERVER_BUSY_MESSAGE:
+                print(role)
             else:
-                login_moderator["Attempts_Left"][log_mod_i] -= 1
-                attempt_left = login_moderator["Attempts_Left"][log_mod_i]
+                attempt_left = login_throttle.record_failure(conn, username)
                 print(f"You have {attempt_left} atemps left")
                 if attempt_left == 0:
-                    login_moderator["Inital_Time_Locked"][log_mod_i] = time.time()
-                    print("You have been locked out for the duration of 5 minutes")
+                    print(f"You have been locked out for the duration of {login_throttle.lockout_seconds // 60} minutes")
         elif choice=='3':
             # Exit
             print("\nThank you for using the authentication system.")
@@ -1,10 +1,11 @@
 import streamlit as st
 import pandas as pd
-from app.data.db import connect_database
+from app.services.db_session import require_session
+from app.services.session_service import revoke_session
 from app.data.users import get_user_by_username
-from app.data.incidents import get_all_incidents, get_high_severity_by_status, get_incidents_by_type_count
-from app.data.datasets import get_all_datasets_metadata
-from app.data.tickets import get_all_tickets
+from app.data.incidents import get_incidents_page, get_incidents_by_type_count
+from app.data.kpis import get_kpi_summary
+from app.data.incident_anomalies import get_recent_anomalies
 from app.data.db import DB_PATH, DATA_DIR
 
 st.set_page_config(
@@ -24,7 +25,7 @@ if not st.session_state.logged_in:
         st.switch_page("Home.py")
     st.stop()
 
-conn = connect_database()
+conn = require_session()
 
 st.title('Dashboard')
 st.header("Domain-Specific Visuals")
@@ -68,6 +69,7 @@ with st.sidebar:
     
     # Logout Button (anchored at bottom)
     if st.button("Logout", type="secondary", use_container_width=True):
+        revoke_session(conn, st.session_state.get("session_token"))
         st.session_state.logged_in = False
         st.session_state.username = None
         st.session_state.role = None
@@ -79,20 +81,19 @@ st.success(f"✅ Welcome back, **{st.session_state.username}**! You are logged i
 
 # --- Fetch Data (Week 8 Functions) ---
 # Cybersecurity Data
-incidents_df = get_all_incidents(conn)
-high_sev_status_df = get_high_severity_by_status(conn)
+# Only the rows shown in "Recent Incidents"
+incidents_df, _ = get_incidents_page(conn, columns=["id", "date", "incident_type", "severity", "status"], page_size=8)
 incidents_by_type = get_incidents_by_type_count(conn)
+# Scored by the background anomaly job, the page only reads the stored flags
+anomalies_df = get_recent_anomalies(conn, limit=5)
 
-# Data Science Data
-datasets_df = get_all_datasets_metadata(conn)
-total_datasets = len(datasets_df)
-total_records = datasets_df['record_count'].sum() if not datasets_df.empty else 0
-total_size_mb = datasets_df['file_size_mb'].sum() if not datasets_df.empty else 0
-
-# IT Operations Data
-tickets_df = get_all_tickets(conn)
-open_tickets = len(tickets_df[tickets_df['status'] != 'Resolved']) if not tickets_df.empty else 0
-high_priority_tickets = len(tickets_df[tickets_df['priority'] == 'High']) if 'priority' in tickets_df.columns and not tickets_df.empty else 0
+# KPI totals come from the trigger-maintained rollup tables
+kpis = get_kpi_summary(conn)
+total_datasets = kpis["total_datasets"]
+total_records = kpis["total_records"]
+total_size_mb = kpis["total_size_mb"]
+open_tickets = kpis["open_tickets"]
+high_priority_tickets = kpis["high_priority_tickets"]
 
 # --- KPI Metrics (From Workshop Slide 15) ---
 st.subheader("📈 Key Performance Indicators")
@@ -103,7 +104,7 @@ col1, col2, col3, col4 = st.columns(4)
 with col1:
     st.markdown(f"""
         ### Security Incidents
-        ## {len(incidents_df)}
+        ## {kpis["total_incidents"]}
     """)
 
 with col2:
@@ -119,7 +120,7 @@ with col3:
     """)
 
 with col4:
-    high_sev_count = high_sev_status_df['count'].sum() if not high_sev_status_df.empty else 0
+    high_sev_count = kpis["high_severity_incidents"]
     st.markdown(f"""
         ### High Severity
         ## {high_sev_count}
@@ -157,6 +158,21 @@ with st.container():
             )
         else:
             st.info("No recent incidents")
+
+    if not anomalies_df.empty:
+        st.warning(f"🚨 {len(anomalies_df)} recent incident surge(s) detected")
+        st.dataframe(
+            anomalies_df,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "incident_type": "Type",
+                "bucket_start": "Hour",
+                "count": "Incidents",
+                "expected": st.column_config.NumberColumn("Expected", format="%.1f"),
+                "methods": "Detected By"
+            }
+        )
     
     # Quick Actions for looking pretty
     with st.expander("⚡ Cybersecurity Actions"):
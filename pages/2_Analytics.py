@@ -1,7 +1,11 @@
 import streamlit as st
 import pandas as pd
-from app.data.db import connect_database
+from app.services.db_session import require_session
+from app.services.session_service import revoke_session
 from app.data.incidents import get_incidents_by_type_count, get_high_severity_by_status
+from app.data.incident_trends import get_incident_trend
+from app.data.ticket_analytics import get_staff_performance
+from app.data.resolution_stats import get_resolution_percentiles
 
 st.set_page_config(
     page_title="Analytics | Intelligence Platform",
@@ -22,7 +26,7 @@ if not st.session_state.logged_in:
     st.stop()
 
 # database connection
-conn = connect_database()
+conn = require_session()
 # Sidebar (Matching Dashboard)
 with st.sidebar:
     st.subheader("User Panel")
@@ -55,9 +59,15 @@ with st.sidebar:
         "Analysis Type",
         ["Cybersecurity", "Data Science", "IT Operations", "All Domains"]
     )
+    trend_period = st.selectbox(
+        "Trend Granularity",
+        ["month", "week", "day"],
+        format_func=str.capitalize
+    )
     
     # Logout Button
     if st.button("🚪 Logout", type="secondary", use_container_width=True):
+        revoke_session(conn, st.session_state.get("session_token"))
         st.session_state.logged_in = False
         st.session_state.username = None
         st.session_state.role = None
@@ -84,21 +94,24 @@ st.divider()
 st.subheader("🎯 Phishing Surge Analysis")
 
 
-trend_hardcoded= pd.DataFrame({
-    'Month': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun'],
-    'Phishing Cases': [12, 15, 22, 35, 42, 38],
-    'Resolution Rate %': [85, 82, 78, 65, 58, 62]
+phishing_trend = get_incident_trend(conn, "Phishing", trend_period).rename(columns={
+    'period': trend_period.capitalize(),
+    'incidents': 'Phishing Cases',
+    'resolution_rate': 'Resolution Rate %'
 })
 
 trend_col1, trend_col2 = st.columns(2)
 
-with trend_col1:
-    st.subheader("Phishing Cases Over Time")
-    st.line_chart(trend_hardcoded.set_index('Month')['Phishing Cases'])
+if phishing_trend.empty:
+    st.info("No phishing incidents recorded yet")
+else:
+    with trend_col1:
+        st.subheader("Phishing Cases Over Time")
+        st.line_chart(phishing_trend.set_index(trend_period.capitalize())['Phishing Cases'])
 
-with trend_col2:
-    st.subheader("Resolution Rate Trend")
-    st.line_chart(trend_hardcoded.set_index('Month')['Resolution Rate %'])
+    with trend_col2:
+        st.subheader("Resolution Rate Trend")
+        st.line_chart(phishing_trend.set_index(trend_period.capitalize())['Resolution Rate %'])
 
 
 st.divider()
@@ -106,12 +119,15 @@ st.subheader("🖥️ IT Operations Analysis")
 
 st.write("**Problem Statement:** Slow resolution times and staff performance anomalies")
 
-# Simulated staff performance
-performance_data = pd.DataFrame({
-    'Staff': ['Alice', 'Bob', 'Charlie', 'Diana', 'Eve'],
-    'Tickets Assigned': [45, 38, 52, 41, 47],
-    'Resolved': [42, 35, 46, 40, 44],
-    'Resolution Rate %': [93.3, 92.1, 88.5, 97.6, 93.6]
+# Staff performance computed from it_tickets
+performance_data = get_staff_performance(conn).rename(columns={
+    'assigned_to': 'Staff',
+    'assigned': 'Tickets Assigned',
+    'resolved': 'Resolved',
+    'resolution_rate': 'Resolution Rate %',
+    'mean_hours': 'Mean Hours',
+    'p50_hours': 'P50 Hours',
+    'p90_hours': 'P90 Hours'
 })
 
 it_col1, it_col2 = st.columns(2)
@@ -123,3 +139,21 @@ with it_col1:
 with it_col2:
     st.subheader("Performance Distribution")
     st.bar_chart(performance_data.set_index('Staff')['Resolution Rate %'])
+
+st.subheader("Resolution Time Percentiles by Priority")
+priority_percentiles = get_resolution_percentiles(conn, "priority")
+if priority_percentiles.empty:
+    st.info("No resolved tickets yet")
+else:
+    st.dataframe(
+        priority_percentiles,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "key": "Priority",
+            "count": "Resolved Tickets",
+            "p50_hours": "P50 Hours",
+            "p90_hours": "P90 Hours",
+            "p99_hours": "P99 Hours"
+        }
+    )
@@ -1,6 +1,15 @@
+import os
+import threading
 import streamlit as st
-from google import genai
-import time
+from app.services.db_session import require_session, get_index_builder
+from app.services.session_service import revoke_session
+from app.services.llm_client import create_llm_client, LLMCancelledError
+from app.services.response_cache import get_response_cache, make_cache_key
+from app.services.context_builder import ContextBuilder, DEFAULT_BUDGET_TOKENS, MAX_SUMMARY_LINES
+from app.data.retrieval import retrieve
+from app.services.chat_history import (
+    start_conversation, append_message, get_latest_conversation, load_messages, PAGE_SIZE, RENDER_LIMIT
+)
 
 st.set_page_config(
     page_title="AI Assistant | Intelligence Platform",
@@ -12,13 +21,19 @@ if "logged_in" not in st.session_state or not st.session_state.logged_in:
     if st.button("Go to Login", key="go_login_ai"):
         st.switch_page("Home.py")
     st.stop()
-# Initialize Gemini client
+conn = require_session()
+# Builds the record index in the background; retrieval stays empty until the first pass is done
+get_index_builder()
+# One streaming client per process, LLM_BACKEND=stub runs without the network
+@st.cache_resource
+def get_llm_client(backend):
+    api_key = st.secrets["GEMINI_API_KEY"] if backend == "gemini" else None
+    return create_llm_client(backend, api_key=api_key)
+
 try:
-    client = genai.Client(api_key=st.secrets["GEMINI_API_KEY"])
-    selected_model = "models/gemini-2.0-flash-exp"
-    
+    llm = get_llm_client(os.environ.get("LLM_BACKEND", "gemini"))
 except Exception as e:
-    st.error(f"Failed to initialize Gemini: {e}")
+    st.error(f"Failed to initialize the AI backend: {e}")
     st.stop()
 # --- Sidebar ---
 with st.sidebar:
@@ -66,13 +81,39 @@ with st.sidebar:
         key="tokens_slider_ai"
     )
     
+    context_budget = st.slider(
+        "Context Budget", 500, 8000, DEFAULT_BUDGET_TOKENS, 250,
+        help="Maximum prompt size in tokens, older turns are summarized",
+        key="context_budget_ai"
+    )
+    
+    use_records = st.checkbox(
+        "Use platform records", value=True,
+        help="Look up related incidents and tickets and give them to the assistant",
+        key="use_records_ai"
+    )
+    
+    response_cache = get_response_cache()
+    cache_stats = response_cache.metrics()
+    if not response_cache.is_cacheable(temperature):
+        st.caption("Answers above this temperature are not cached")
+    st.caption(f"Cache hit rate: {cache_stats['hit_rate']:.0%} "
+               f"({cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, {cache_stats['misses']} misses)")
+    
     if st.button("🗑️ Clear Chat", use_container_width=True, key="clear_chat_ai"):
+        # Starts a new conversation, the old one stays in the history table
+        st.session_state.conversation_id = None
         st.session_state.conversation = []
+        st.session_state.conversation_offset = 0
+        st.session_state.conversation_summary = None
+        st.session_state.older_messages = None
+        st.session_state.context_builder = ContextBuilder()
         st.rerun()
     
     st.divider()
     
     if st.button("🚪 Logout", type="secondary", key="logout_ai"):
+        revoke_session(conn, st.session_state.get("session_token"))
         st.session_state.logged_in = False
         st.session_state.username = None
         st.session_state.role = None
@@ -80,11 +121,43 @@ with st.sidebar:
 
 # --- Main Content ---
 st.title("🤖 Gemini AI Assistant")
-st.caption(f"Domain: {domain} | Model: Gemini Flash")
+st.caption(f"Domain: {domain} | Model: {llm.model}")
+
+# Resume the user's latest conversation, only its newest RENDER_LIMIT messages are loaded
+if st.session_state.get("conversation_user") != st.session_state.username:
+    latest = get_latest_conversation(conn, st.session_state.username)
+    messages = load_messages(conn, latest["id"], limit=RENDER_LIMIT)[0] if latest else []
+    st.session_state.conversation_user = st.session_state.username
+    st.session_state.conversation_id = latest["id"] if latest else None
+    st.session_state.conversation = messages
+    # Messages of this conversation that are not held in session state
+    st.session_state.conversation_offset = latest["message_count"] - len(messages) if latest else 0
+    st.session_state.conversation_summary = latest["summary"] if latest else None
+    st.session_state.older_messages = None
+    # Turns before the window that the retention job has not folded into the summary yet
+    skipped = []
+    if st.session_state.conversation_offset:
+        skipped = load_messages(conn, latest["id"], before_id=messages[0]["id"], limit=MAX_SUMMARY_LINES)[0]
+    st.session_state.context_builder = ContextBuilder()
+    st.session_state.context_builder.reset(
+        summary_lines=(st.session_state.conversation_summary or "").splitlines(),
+        summarized=st.session_state.conversation_offset,
+        messages=skipped
+    )
+
 
-# Initialize conversation
-if "conversation" not in st.session_state:
-    st.session_state.conversation = []
+def remember(role, content):
+    # Append-only write, then keep the in-memory view capped
+    if st.session_state.conversation_id is None:
+        st.session_state.conversation_id = start_conversation(conn, st.session_state.username, domain)
+    message_id = append_message(conn, st.session_state.conversation_id, role, content)
+    st.session_state.conversation.append({"id": message_id, "role": role, "content": content})
+    while len(st.session_state.conversation) > RENDER_LIMIT:
+        trimmed = st.session_state.conversation.pop(0)
+        st.session_state.conversation_offset += 1
+        if st.session_state.older_messages is not None:
+            # Older pages are on screen, keep them contiguous with the window
+            st.session_state.older_messages["messages"].append(trimmed)
 
 # Domain prompts
 system_prompts = {
@@ -94,6 +167,36 @@ system_prompts = {
     "General": "You are a helpful AI assistant."
 }
 
+# Records each domain may look up
+retrieval_sources = {
+    "Cybersecurity": ["incident"],
+    "Data Science": [],
+    "IT Operations": ["ticket"],
+    "General": ["incident", "ticket"]
+}
+
+# Older messages are fetched a page at a time, only when asked for
+if st.session_state.conversation_offset or st.session_state.conversation_summary:
+    with st.expander("🕘 Earlier messages"):
+        if st.session_state.conversation_summary:
+            st.caption("Summary of compacted messages")
+            st.markdown(st.session_state.conversation_summary)
+        older = st.session_state.older_messages
+        if older and older["messages"]:
+            for message in older["messages"]:
+                with st.chat_message(message["role"]):
+                    st.markdown(message["content"])
+        has_older = st.session_state.conversation_offset > 0 if older is None else older["has_older"]
+        if has_older and st.button("Load older messages", key="load_older_ai"):
+            # One page before the oldest message shown so far
+            shown = older["messages"] if older and older["messages"] else st.session_state.conversation
+            before_id = shown[0]["id"] if shown else None
+            messages, more = load_messages(conn, st.session_state.conversation_id, before_id=before_id, limit=PAGE_SIZE)
+            # Prepend, pages loaded earlier stay on screen
+            st.session_state.older_messages = {"messages": messages + (older["messages"] if older else []),
+                                               "has_older": more}
+            st.rerun()
+
 # Display conversation history
 for i, message in enumerate(st.session_state.conversation):
     role = message.get("role", "")
@@ -111,56 +214,63 @@ if prompt:
         st.markdown(prompt)  # NO KEY HERE
     
     # Add to conversation
-    st.session_state.conversation.append({"role": "user", "content": prompt})
+    remember("user", prompt)
     
     # Get AI response
     with st.chat_message("assistant"):
         message_placeholder = st.empty()
         
         try:
-            # Build conversation context
-            conversation_context = system_prompts[domain] + "\n\n"
-            
-            # Include last 5 messages for context
-            recent_messages = st.session_state.conversation[-5:] if len(st.session_state.conversation) > 5 else st.session_state.conversation
-            
-            for msg in recent_messages:
-                if msg["role"] == "user":
-                    conversation_context += f"User: {msg['content']}\n"
-                else:
-                    conversation_context += f"Assistant: {msg['content']}\n"
-            
-            # Add current prompt
-            conversation_context += f"User: {prompt}\nAssistant: "
+            # Related incidents / tickets from the local vector index
+            references = []
+            if use_records and retrieval_sources[domain]:
+                hits = retrieve([prompt], k=5, sources=retrieval_sources[domain])[0]
+                references = [hit["text"] for hit in hits]
             
-            # Generate response
-            response = client.models.generate_content(
-                model=selected_model,
-                contents=conversation_context,
+            # Newest turns verbatim, older ones as a rolling summary, within the budget
+            conversation_context, context_stats = st.session_state.context_builder.build(
+                system_prompts[domain], st.session_state.conversation,
+                budget_tokens=context_budget, max_output_tokens=max_tokens, references=references,
+                start_index=st.session_state.conversation_offset
             )
+            if context_stats["references"]:
+                st.caption(f"Using {context_stats['references']} related platform record(s)")
+            if context_stats["truncated"]:
+                st.caption("Long message truncated to fit the context budget")
             
-            # Extract response
-            if hasattr(response, 'text'):
-                response_text = response.text
-            else:
-                response_text = str(response)
-            
-            # Simulate streaming
-            words = response_text.split()
-            display_text = ""
-            for i in range(min(30, len(words))):
-                display_text = " ".join(words[:i+1])
-                message_placeholder.markdown(display_text + "▌")  # NO KEY HERE
-                time.sleep(0.03)
-            
-            # Show full response
-            message_placeholder.markdown(response_text)  # NO KEY HERE
+            # A new prompt cancels whatever answer is still streaming
+            previous_cancel = st.session_state.get("ai_cancel_event")
+            if previous_cancel is not None:
+                previous_cancel.set()
+            cancel_event = threading.Event()
+            st.session_state.ai_cancel_event = cancel_event
+
+            # Repeated questions are answered from the cache
+            cache_key = make_cache_key(llm.model, domain, conversation_context, temperature, max_tokens)
+            response_text = response_cache.get(conn, cache_key, temperature)
+            cancelled = False
+            if response_text is None:
+                # Render chunks as they arrive
+                response_text = ""
+                try:
+                    for chunk in llm.stream(conversation_context, temperature=temperature,
+                                            max_tokens=max_tokens, cancel_event=cancel_event):
+                        response_text += chunk
+                        message_placeholder.markdown(response_text + "▌")  # NO KEY HERE
+                    response_cache.put(conn, cache_key, domain, response_text, temperature)
+                except LLMCancelledError:
+                    cancelled = True
             
-            # Store response
-            st.session_state.conversation.append({
-                "role": "assistant", 
-                "content": response_text
-            })
+            if cancelled:
+                # Shown, but neither stored nor cached: a partial answer must
+                # not reach later prompts as if the assistant had said it
+                message_placeholder.markdown(response_text + " *(cancelled)*")  # NO KEY HERE
+            else:
+                # Show full response
+                message_placeholder.markdown(response_text)  # NO KEY HERE
+                
+                # Store response
+                remember("assistant", response_text)
             
         except Exception as e:
             error_msg = str(e)
@@ -170,7 +280,4 @@ if prompt:
             fallback = f"I'm your {domain} assistant. Try rephrasing your question."
             message_placeholder.markdown(fallback)  # NO KEY HERE
             
-            st.session_state.conversation.append({
-                "role": "assistant", 
-                "content": fallback
-            })
+            remember("assistant", fallback)
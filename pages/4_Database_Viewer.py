@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
-from app.data.db import connect_database
+from app.services.db_session import require_session
+from app.services.session_service import revoke_session
+from app.data.pagination import fetch_page, get_table_names, get_table_columns, estimate_row_count
 
 st.set_page_config(
     page_title="Database Viewer | Intelligence Platform",
@@ -22,7 +24,7 @@ if not st.session_state.logged_in:
     st.stop()
 
 # Database connection
-conn = connect_database()
+conn = require_session()
 
 # Sidebar (Matching Dashboard)
 with st.sidebar:
@@ -52,22 +54,13 @@ with st.sidebar:
     # Database Info
     st.subheader("Database Info")
     
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = cursor.fetchall()
+    tables = get_table_names(conn)
     
     st.metric("Tables", len(tables))
     
-    # Table sizes (mock)
-    table_sizes = {
-        "users": "45 rows",
-        "cyber_incidents": "127 rows", 
-        "datasets_metadata": "32 rows",
-        "it_tickets": "89 rows"
-    }
-    
-    for table, size in table_sizes.items():
-        st.caption(f"`{table}`: {size}")
+    # Estimated sizes, no table scans
+    for table in ["users", "cyber_incidents", "datasets_metadata", "it_tickets"]:
+        st.caption(f"`{table}`: ~{estimate_row_count(conn, table):,} rows")
     
     st.divider()
     
@@ -85,6 +78,7 @@ with st.sidebar:
     
     # Logout Button
     if st.button("Logout", type="secondary", use_container_width=True):
+        revoke_session(conn, st.session_state.get("session_token"))
         st.session_state.logged_in = False
         st.session_state.username = None
         st.session_state.role = None
@@ -95,45 +89,22 @@ st.text('Week 8 Database Implementation - Interactive Data Exploration')
 st.success(f"Welcome to database viewer, **{st.session_state.username}**!")
 st.subheader("Database Overview")
 cursor = conn.cursor()
-cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-tables_result = cursor.fetchall()
-tables = [table[0] for table in tables_result]
+tables = get_table_names(conn)
 
-# Display table stats
+# Display table stats (estimates, COUNT(*) scans the whole table)
 stats_col1, stats_col2, stats_col3, stats_col4 = st.columns(4)
 
-# Calculate actual row counts
-with stats_col1:
-    cursor.execute("SELECT COUNT(*) FROM users")
-    user_count = cursor.fetchone()[0]
-    st.markdown(f"""
-    ### Users
-    ## {user_count}
-    """)
-
-with stats_col2:
-    cursor.execute("SELECT COUNT(*) FROM cyber_incidents")
-    incident_count = cursor.fetchone()[0]
-    st.markdown(f"""
-    ### Incidents
-    ## {incident_count}
-    """)
-
-with stats_col3:
-    cursor.execute("SELECT COUNT(*) FROM datasets_metadata")
-    dataset_count = cursor.fetchone()[0]
-    st.markdown(f"""
-    ### Datasets
-    ## {dataset_count}
-    """)
-
-with stats_col4:
-    cursor.execute("SELECT COUNT(*) FROM it_tickets")
-    ticket_count = cursor.fetchone()[0]
-    st.markdown(f"""
-    ### Tickets
-    ## {ticket_count}
-    """)
+for stats_col, label, table in [
+    (stats_col1, "Users", "users"),
+    (stats_col2, "Incidents", "cyber_incidents"),
+    (stats_col3, "Datasets", "datasets_metadata"),
+    (stats_col4, "Tickets", "it_tickets"),
+]:
+    with stats_col:
+        st.markdown(f"""
+        ### {label}
+        ## ~{estimate_row_count(conn, table):,}
+        """)
 
 st.divider()
 st.subheader("Table Explorer")
@@ -145,10 +116,41 @@ selected_table = st.selectbox(
 )
 
 if selected_table:
-    # Get table data
-    query = f"SELECT * FROM {selected_table}"
-    df = pd.read_sql_query(query, conn)
-    
+    table_columns = get_table_columns(conn, selected_table)
+
+    # Only the chosen columns, filter and sort are sent to SQLite
+    with st.expander("Columns, Filter & Sort", expanded=False):
+        shown_columns = st.multiselect("Columns", table_columns, default=table_columns)
+        filter_col1, filter_col2 = st.columns(2)
+        with filter_col1:
+            filter_column = st.selectbox("Filter Column", ["(none)"] + table_columns)
+        with filter_col2:
+            filter_value = st.text_input("Equals", disabled=filter_column == "(none)")
+        sort_col1, sort_col2, sort_col3 = st.columns(3)
+        with sort_col1:
+            sort_column = st.selectbox("Sort By", ["(row order)"] + table_columns)
+        with sort_col2:
+            sort_descending = st.radio("Direction", ["Descending", "Ascending"], horizontal=True) == "Descending"
+        with sort_col3:
+            page_size = st.selectbox("Rows per Page", [25, 50, 100, 250], index=1)
+
+    shown_columns = shown_columns or table_columns
+    filters = {filter_column: filter_value} if filter_column != "(none)" and filter_value else None
+    order_by = None if sort_column == "(row order)" else sort_column
+
+    # Page start tokens, reset whenever the query changes
+    view_key = (selected_table, tuple(shown_columns), filter_column, filter_value, sort_column, sort_descending, page_size)
+    if st.session_state.get("viewer_key") != view_key:
+        st.session_state.viewer_key = view_key
+        st.session_state.viewer_tokens = [None]
+    page_index = len(st.session_state.viewer_tokens) - 1
+
+    df, next_token = fetch_page(
+        conn, selected_table, columns=shown_columns, filters=filters, order_by=order_by,
+        descending=sort_descending, page_size=page_size,
+        page_token=st.session_state.viewer_tokens[-1]
+    )
+
     # Get table schema
     cursor.execute(f"PRAGMA table_info({selected_table})")
     schema = cursor.fetchall()
@@ -158,10 +160,19 @@ if selected_table:
     
     with table_col1:
         st.subheader(f"Table: `{selected_table}`")
-        st.write(f"**Rows:** {len(df):,} | **Columns:** {len(df.columns)}")
+        st.write(f"**Rows:** ~{estimate_row_count(conn, selected_table):,} | **Columns:** {len(table_columns)} | **Page:** {page_index + 1}")
         
-        # Show data with pagination
         st.dataframe(df, use_container_width=True, height=400)
+
+        nav_col1, nav_col2 = st.columns(2)
+        with nav_col1:
+            if st.button("← Previous", use_container_width=True, disabled=page_index == 0):
+                st.session_state.viewer_tokens.pop()
+                st.rerun()
+        with nav_col2:
+            if st.button("Next →", use_container_width=True, disabled=next_token is None):
+                st.session_state.viewer_tokens.append(next_token)
+                st.rerun()
     
     with table_col2:
         st.subheader("Schema Information")
@@ -1,6 +1,9 @@
 import streamlit as st
-import bcrypt
-from app.data.db import connect_database
+from app.services.db_session import require_session
+from app.services.session_service import revoke_session, revoke_user_sessions, count_active_sessions, SESSION_DURATION_MINUTES
+from app.services.auth_pool import get_auth_pool
+from app.services.auth_policy import get_verify_latency_stats
+from app.services.user_service import AUTH_POOL_ERRORS, SERVER_BUSY_MESSAGE
 
 st.set_page_config(
     page_title="Settings | Intelligence Platform", 
@@ -22,7 +25,7 @@ if not st.session_state.logged_in:
     st.stop()
 
 # Database connection
-conn = connect_database()
+conn = require_session()
 username = st.session_state.username
 role = st.session_state.role
 
@@ -70,6 +73,7 @@ with st.sidebar:
     
     # Logout Button
     if st.button("🚪 Logout", type="secondary", use_container_width=True):
+        revoke_session(conn, st.session_state.get("session_token"))
         st.session_state.logged_in = False
         st.session_state.username = None
         st.session_state.role = None
@@ -140,45 +144,70 @@ with st.form("change_password_form"):
         cursor.execute("SELECT password_hash FROM users WHERE username = ?", (username,))
         result = cursor.fetchone()
         
-        if not result:
-            st.error("User not found in database")
-        elif not bcrypt.checkpw(current_password.encode('utf-8'), result[0].encode('utf-8')):
-            st.error("❌ Current password is incorrect")
-        elif new_password != confirm_password:
-            st.error("❌ New passwords do not match")
-        elif len(new_password) < 6:
-            st.error("❌ Password must be at least 6 characters")
-        else:
-            hashed = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
-            cursor.execute(
-                "UPDATE users SET password_hash = ? WHERE username = ?",
-                (hashed.decode('utf-8'), username)
-            )
-            conn.commit()
-            st.success("✅ Password updated successfully!")
+        try:
+            if not result:
+                st.error("User not found in database")
+            elif not get_auth_pool().verify_password(current_password, result[0]):
+                st.error("❌ Current password is incorrect")
+            elif new_password != confirm_password:
+                st.error("❌ New passwords do not match")
+            elif len(new_password) < 6:
+                st.error("❌ Password must be at least 6 characters")
+            else:
+                hashed = get_auth_pool().hash_password(new_password)
+                cursor.execute(
+                    "UPDATE users SET password_hash = ? WHERE username = ?",
+                    (hashed, username)
+                )
+                conn.commit()
+                st.success("✅ Password updated successfully!")
+        except AUTH_POOL_ERRORS:
+            st.warning(f"⚠️ {SERVER_BUSY_MESSAGE}")
 
 st.divider()
 st.subheader("🕒 Session Management")
 
 session_col1, session_col2, session_col3 = st.columns(3)
+session_token = st.session_state.get("session_token")
 
 with session_col1:
-    st.metric("Active Sessions", "1", "Current")
+    st.metric("Active Sessions", count_active_sessions(conn, username), "Current")
     if st.button("🔄 Refresh Session", use_container_width=True):
         st.success("Session refreshed!")
         st.rerun()
 
 with session_col2:
-    st.metric("Session Duration", "15m", "+5m")
+    st.metric("Session Duration", f"{SESSION_DURATION_MINUTES}m", "Sliding")
     if st.button("📱 End Other Sessions", use_container_width=True):
-        st.warning("All other sessions have been terminated")
-        st.info("This is a mock implementation - in a real app, this would clear session tokens")
+        ended = revoke_user_sessions(conn, username, except_token=session_token)
+        st.warning(f"{ended} other session(s) have been terminated")
 
 with session_col3:
     st.metric("Login History", "24", "+2 this week")
     if st.button("📊 View History", use_container_width=True):
         st.info("Login history would be displayed here")
 
+st.divider()
+st.subheader("⚡ Login Performance")
+
+# Password checks of this server process, logins from every session
+verify_stats = get_verify_latency_stats()
+pool_stats = get_auth_pool().metrics()
+perf_col1, perf_col2, perf_col3 = st.columns(3)
+
+with perf_col1:
+    p50 = verify_stats["p50_ms"]
+    st.metric("Password Check p50", f"≤ {p50:.0f} ms" if p50 is not None else "—",
+              f"{verify_stats['count']} logins", delta_color="off")
+
+with perf_col2:
+    p99 = verify_stats["p99_ms"]
+    st.metric("Password Check p99", f"≤ {p99:.0f} ms" if p99 is not None else "—", delta_color="off")
+
+with perf_col3:
+    st.metric("Auth Queue", f"{pool_stats['pending']}/{pool_stats['max_queue']}",
+              f"{pool_stats['rejected']} rejected", delta_color="inverse")
+
 # Preferences
 st.divider()
 st.subheader("⚙️ Preferences")
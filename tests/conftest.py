@@ -0,0 +1,12 @@
+import pytest
+from app.data.db import connect_database
+from app.data.migrate import migrate
+
+
+@pytest.fixture
+def conn():
+    # A fresh, fully migrated database per test
+    conn = connect_database(":memory:")
+    migrate(conn)
+    yield conn
+    conn.close()
@@ -0,0 +1,63 @@
+from app.services.context_builder import CONTEXT_WINDOW_TOKENS, ContextBuilder, estimate_tokens
+
+SYSTEM_PROMPT = "You are a helpful security analyst."
+
+
+def _conversation(turns, words=60):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": " ".join([f"turn{i}"] * words)}
+        for i in range(turns)
+    ]
+
+
+def test_short_conversation_is_kept_verbatim():
+    prompt, stats = ContextBuilder(budget_tokens=3000).build(SYSTEM_PROMPT, _conversation(3))
+    assert stats["messages_verbatim"] == 3
+    assert stats["messages_summarized"] == 0
+    assert "Summary of earlier conversation" not in prompt
+
+
+def test_long_conversation_stays_within_budget():
+    builder = ContextBuilder(budget_tokens=500)
+    messages = _conversation(40)
+    prompt, stats = builder.build(SYSTEM_PROMPT, messages)
+    assert stats["prompt_tokens"] == estimate_tokens(prompt) <= 500
+    # The newest turns are verbatim, the older ones summarized
+    assert stats["messages_verbatim"] + stats["messages_summarized"] == 40
+    assert stats["messages_summarized"] > 0
+    assert prompt.rstrip().endswith("Assistant:")
+    assert "turn39" in prompt
+
+
+def test_oversized_prompt_is_truncated_to_fit():
+    huge = [{"role": "user", "content": "x" * 20000}]
+    prompt, stats = ContextBuilder(budget_tokens=400).build(SYSTEM_PROMPT, huge)
+    assert stats["truncated"]
+    assert stats["prompt_tokens"] <= 400
+
+
+def test_references_get_at_most_their_share():
+    references = [" ".join(["record"] * 50)] * 5
+    builder = ContextBuilder(budget_tokens=1000, reference_share=0.25)
+    prompt, stats = builder.build(SYSTEM_PROMPT, _conversation(1), references=references)
+    assert 1 <= stats["references"] < 5
+    assert stats["prompt_tokens"] <= 1000
+    assert estimate_tokens(prompt.split("Relevant platform records:")[1].split("User:")[0]) <= 250
+
+
+def test_budget_leaves_room_for_the_answer():
+    builder = ContextBuilder(budget_tokens=CONTEXT_WINDOW_TOKENS)
+    _prompt, stats = builder.build(SYSTEM_PROMPT, _conversation(400, words=200), max_output_tokens=2000)
+    assert stats["budget_tokens"] == CONTEXT_WINDOW_TOKENS - 2000
+    assert stats["prompt_tokens"] <= CONTEXT_WINDOW_TOKENS - 2000
+
+
+def test_summarized_turns_never_return_verbatim():
+    builder = ContextBuilder(budget_tokens=500)
+    messages = _conversation(40)
+    builder.build(SYSTEM_PROMPT, messages)
+    summarized = builder.build(SYSTEM_PROMPT, messages)[1]["messages_summarized"]
+    # A short new turn would fit, but the summarized turns stay summarized
+    messages.append({"role": "user", "content": "short"})
+    _prompt, stats = builder.build(SYSTEM_PROMPT, messages)
+    assert stats["messages_summarized"] >= summarized
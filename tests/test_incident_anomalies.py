@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from app.data.incident_anomalies import MIN_COUNT, detect_anomalies, get_recent_anomalies, refresh_anomalies
+
+
+def _daily_counts(days=120, surge_day=100, surge=40, seed=0):
+    # Weekly cycle (busier weekdays) with Poisson noise and one surge
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=days, freq="D")
+    baseline = np.where(index.dayofweek < 5, 10.0, 4.0)
+    counts = rng.poisson(baseline)
+    counts[surge_day] += surge
+    return pd.Series(counts, index=index)
+
+
+def test_surge_is_flagged():
+    counts = _daily_counts()
+    result = detect_anomalies(counts, period="day")
+    flagged = result.index[result["is_anomaly"]]
+    assert counts.index[100] in flagged
+    assert result.loc[counts.index[100], "expected"] < counts.iloc[100]
+
+
+def test_noise_alone_is_not_flagged():
+    counts = _daily_counts(surge=0)
+    result = detect_anomalies(counts, period="day")
+    assert result["is_anomaly"].sum() <= 1
+
+
+def test_sparse_buckets_are_never_flagged():
+    # A jump from zero is a huge score but below MIN_COUNT incidents
+    counts = pd.Series(0, index=pd.date_range("2024-01-01", periods=60, freq="D"))
+    counts.iloc[50] = MIN_COUNT - 1
+    assert not detect_anomalies(counts, period="day")["is_anomaly"].any()
+
+
+def test_refresh_stores_the_surge(conn):
+    counts = _daily_counts()
+    rows = [(f"{day:%Y-%m-%d} 12:00:00",) for day, count in counts.items() for _ in range(count)]
+    with conn:
+        conn.executemany(
+            "INSERT INTO cyber_incidents (date, incident_type, severity, status, description) VALUES (?, 'Malware', 'High', 'Open', 'x')",
+            rows
+        )
+    assert refresh_anomalies(conn, period="day") >= 1
+    anomalies = get_recent_anomalies(conn, period="day", limit=50)
+    assert str(counts.index[100].date()) in set(anomalies["bucket_start"].str[:10])
+    # Nothing changed since: the second run is a no-op
+    assert refresh_anomalies(conn, period="day") == 0
@@ -0,0 +1,73 @@
+import pytest
+from app.data import incident_trends
+from app.data.incident_trends import get_incident_trend, invalidate_incident_dates
+from app.data.incidents import insert_incident
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    # In-memory databases are keyed by connection id, which a later test may reuse
+    monkeypatch.setattr(incident_trends, "_closed_buckets", {})
+
+
+@pytest.fixture
+def incidents(conn):
+    rows = [("2020-01-10", "Open"), ("2020-01-20", "Resolved"), ("2020-02-05", "Open")]
+    with conn:
+        conn.executemany(
+            "INSERT INTO cyber_incidents (date, incident_type, severity, status, description) VALUES (?, 'Phishing', 'High', ?, 'x')",
+            rows
+        )
+    return conn
+
+
+def _counts(conn):
+    df = get_incident_trend(conn, period="month")
+    return {row.period: (row.incidents, row.resolved) for row in df.itertuples()}
+
+
+def _move_incident(conn, incident_id, date):
+    # Same count and status totals, so only a reported date can reveal it
+    conn.execute("UPDATE cyber_incidents SET date = ? WHERE id = ?", (date, incident_id))
+
+
+def test_insert_through_app_data_is_counted(incidents):
+    assert _counts(incidents) == {"2020-01": (2, 1), "2020-02": (1, 0)}
+    with incidents:
+        insert_incident(incidents, "2020-02-14", "Phishing", "High", "Closed", "y")
+    assert _counts(incidents) == {"2020-01": (2, 1), "2020-02": (2, 1)}
+
+
+def test_reported_dates_refresh_only_after_commit(incidents):
+    _counts(incidents)
+    _move_incident(incidents, 1, "2020-02-01")
+    invalidate_incident_dates(incidents, ["2020-01-10", "2020-02-01"])
+    # Not committed yet: the cached buckets are not marked
+    assert all(not entry["dirty"] for entry in incident_trends._closed_buckets.values())
+    incidents.commit()
+    assert _counts(incidents) == {"2020-01": (1, 1), "2020-02": (2, 0)}
+
+
+def test_rolled_back_write_leaves_the_cache_clean(incidents):
+    _counts(incidents)
+    _move_incident(incidents, 1, "2020-02-01")
+    invalidate_incident_dates(incidents, ["2020-01-10", "2020-02-01"])
+    incidents.rollback()
+    assert all(not entry["dirty"] for entry in incident_trends._closed_buckets.values())
+    assert _counts(incidents) == {"2020-01": (2, 1), "2020-02": (1, 0)}
+
+
+def test_unreported_write_is_caught_by_the_fingerprint(incidents):
+    _counts(incidents)
+    with incidents:
+        incidents.execute("UPDATE cyber_incidents SET status = 'Closed' WHERE id = 3")
+    assert _counts(incidents)["2020-02"] == (1, 1)
+
+
+def test_unreported_move_stays_hidden_until_expiry(incidents, monkeypatch):
+    _counts(incidents)
+    with incidents:
+        _move_incident(incidents, 1, "2020-02-01")
+    assert _counts(incidents)["2020-01"] == (2, 1)
+    monkeypatch.setattr(incident_trends, "CLOSED_BUCKETS_TTL_SECONDS", -1)
+    assert _counts(incidents) == {"2020-01": (1, 1), "2020-02": (2, 0)}
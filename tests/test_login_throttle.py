@@ -0,0 +1,82 @@
+import pytest
+from app.services import login_throttle
+from app.services.login_throttle import LoginThrottle
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(login_throttle.time, "time", clock.time)
+    return clock
+
+
+@pytest.fixture
+def throttle():
+    # cache_ttl=0: every check reads what the database holds
+    return LoginThrottle(max_attempts=3, window_seconds=300, lockout_seconds=600, cache_ttl=0)
+
+
+def test_lockout_after_max_attempts(conn, clock, throttle):
+    assert [throttle.record_failure(conn, "alice") for _ in range(3)] == [2, 1, 0]
+    assert throttle.check(conn, "alice") == (False, 601)
+    # Other usernames are not affected
+    assert throttle.check(conn, "bob") == (True, 0)
+
+
+def test_lockout_expires(conn, clock, throttle):
+    for _ in range(3):
+        throttle.record_failure(conn, "alice")
+    clock.now += 599
+    assert not throttle.check(conn, "alice")[0]
+    clock.now += 2
+    assert throttle.check(conn, "alice") == (True, 0)
+    # The bucket is full again after a lockout
+    assert throttle.record_failure(conn, "alice") == 2
+
+
+def test_tokens_refill_gradually(conn, clock, throttle):
+    throttle.record_failure(conn, "alice")
+    throttle.record_failure(conn, "alice")
+    # One token back every 100 seconds
+    clock.now += 100
+    assert throttle.record_failure(conn, "alice") == 1
+    assert throttle.check(conn, "alice") == (True, 0)
+
+
+def test_burst_across_a_window_boundary_locks(conn, clock, throttle):
+    # A fixed window starting at the first failure would reset at 300s and
+    # allow this burst; the bucket has barely refilled in between
+    throttle.record_failure(conn, "alice")
+    clock.now += 299
+    throttle.record_failure(conn, "alice")
+    clock.now += 2
+    assert throttle.record_failure(conn, "alice") == 1
+    clock.now += 1
+    assert throttle.record_failure(conn, "alice") == 0
+    assert not throttle.check(conn, "alice")[0]
+
+
+def test_success_clears_the_failures(conn, clock, throttle):
+    throttle.record_failure(conn, "alice")
+    throttle.record_failure(conn, "alice")
+    throttle.record_success(conn, "alice")
+    assert throttle.record_failure(conn, "alice") == 2
+
+
+def test_purge_deletes_only_idle_unlocked_rows(conn, clock):
+    throttle = LoginThrottle(max_attempts=1, lockout_seconds=2 * login_throttle.RETENTION_SECONDS, cache_ttl=0)
+    throttle.record_failure(conn, "alice")
+    LoginThrottle(max_attempts=3, cache_ttl=0).record_failure(conn, "bob")
+    assert throttle.purge_expired(conn) == 0
+    clock.now += login_throttle.RETENTION_SECONDS + 1
+    # bob is idle, alice is idle but still locked
+    assert throttle.purge_expired(conn) == 1
+    assert not throttle.check(conn, "alice")[0]
@@ -0,0 +1,58 @@
+import pytest
+from app.data.pagination import decode_page_token, encode_page_token, fetch_page
+
+
+@pytest.fixture
+def incidents(conn):
+    # Repeated dates exercise the id tie-breaker, NULL dates the seek predicate
+    dates = ["2024-01-03", None, "2024-01-01", "2024-01-03", None, "2024-01-02", "2024-01-01", None, "2024-01-02"]
+    with conn:
+        conn.executemany(
+            "INSERT INTO cyber_incidents (date, incident_type, severity, status, description) VALUES (?, 'Phishing', 'High', 'Open', ?)",
+            [(date, f"incident {i}") for i, date in enumerate(dates)]
+        )
+    return conn
+
+
+def _all_pages(conn, **kwargs):
+    ids, token, pages = [], None, 0
+    while True:
+        df, token = fetch_page(conn, "cyber_incidents", columns=["id", "date"], page_token=token, **kwargs)
+        ids.extend(df["id"].tolist())
+        pages += 1
+        if token is None:
+            return ids, pages
+
+
+def test_page_token_round_trip():
+    values = ["2024-01-03", 42]
+    assert decode_page_token(encode_page_token(values)) == values
+    assert decode_page_token(encode_page_token([None, 7])) == [None, 7]
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_pages_cover_every_row_once_in_order_with_nulls(incidents, descending):
+    direction = "DESC" if descending else "ASC"
+    expected = [row[0] for row in incidents.execute(
+        f"SELECT id FROM cyber_incidents ORDER BY date {direction}, id {direction}")]
+
+    ids, pages = _all_pages(incidents, order_by="date", descending=descending, page_size=2)
+
+    assert ids == expected
+    assert pages == 5
+
+
+def test_last_page_has_no_token(incidents):
+    df, token = fetch_page(incidents, "cyber_incidents", page_size=9)
+    assert len(df) == 9
+    assert token is None
+
+
+def test_filters_apply_to_every_page(incidents):
+    ids, _pages = _all_pages(incidents, filters={"date": None}, order_by="date", page_size=1)
+    assert ids == [8, 5, 2]
+
+
+def test_unknown_column_is_rejected(incidents):
+    with pytest.raises(ValueError):
+        fetch_page(incidents, "cyber_incidents", order_by="date; DROP TABLE users")